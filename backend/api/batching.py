@@ -0,0 +1,101 @@
+import asyncio
+from typing import Any, Callable, List, Optional, Tuple
+
+
+class MicroBatcher:
+    """
+    Agrupa requisições concorrentes em uma única chamada em lote
+
+    Itens que chegam dentro de uma janela curta (max_wait_ms) são
+    processados juntos por batch_fn, que roda fora do event loop.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 10.0
+    ):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Inicia a task consumidora (deve rodar dentro do event loop)"""
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Cancela a task consumidora"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def submit(self, item: Any) -> Any:
+        """Enfileira um item e aguarda o resultado do seu lote"""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _collect(self) -> List[Tuple[Any, asyncio.Future]]:
+        """Espera o primeiro item e junta os que chegarem até o prazo"""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = await self._collect()
+            # Requisições canceladas (cliente desconectou) saem do lote
+            batch = [(item, future) for item, future in batch if not future.done()]
+            if not batch:
+                continue
+
+            try:
+                results = await loop.run_in_executor(
+                    None, self.batch_fn, [item for item, _ in batch]
+                )
+            except Exception:
+                # Um item inválido não derruba o lote: cada um roda sozinho
+                # e só o que falhar recebe a exceção
+                await self._run_individually(batch)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    async def _run_individually(self, batch: List[Tuple[Any, asyncio.Future]]):
+        """Reprocessa um lote que falhou, item a item"""
+        loop = asyncio.get_running_loop()
+
+        for item, future in batch:
+            if future.done():
+                continue
+            try:
+                result = (await loop.run_in_executor(None, self.batch_fn, [item]))[0]
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+                continue
+            if not future.done():
+                future.set_result(result)
@@ -0,0 +1,29 @@
+from typing import Iterable
+
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class SelectiveGZipMiddleware:
+    """
+    GZip para respostas grandes, exceto nas rotas de streaming
+
+    O compressor retém os dados até juntar um bloco, o que seguraria os
+    tokens do SSE; essas rotas passam direto, sem compressão.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 500,
+        exclude_paths: Iterable[str] = ("/ask/stream",)
+    ):
+        self.app = app
+        self.gzip_app = GZipMiddleware(app, minimum_size=minimum_size)
+        self.exclude_paths = frozenset(exclude_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] == "http" and scope["path"] not in self.exclude_paths:
+            await self.gzip_app(scope, receive, send)
+        else:
+            await self.app(scope, receive, send)
@@ -1,15 +1,33 @@
-from fastapi import FastAPI, HTTPException
+from backend.utils.blas import configure_blas_threads
+
+configure_blas_threads()
+
+from fastapi import FastAPI, HTTPException, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Dict, Optional
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from typing import List, Dict, Optional, Iterator, Callable
 from pathlib import Path
+import numpy as np
+import orjson
 
-from backend.core.rag_engine import RAGEngine
+from backend.api.batching import MicroBatcher
+from backend.api.compression import SelectiveGZipMiddleware
+from backend.core.rag_engine import RAGEngine, LLM_ERROR_PREFIX
+from backend.core.semantic_cache import SemanticCache
+from backend.core.session_store import SessionStore
 
 class QuestionRequest(BaseModel):
     question: str
-    top_k: Optional[int] = 5
+    top_k: int = Field(5, ge=1, le=50)
     temperature: Optional[float] = 0.3
+    session_id: Optional[str] = None
+
+
+class TurnRequest(BaseModel):
+    question: str
+    answer: str
 
 
 class Source(BaseModel):
@@ -30,9 +48,13 @@ class QuestionResponse(BaseModel):
 app = FastAPI(
     title="Sage's Oracle API",
     description="D&D 5e Rules Assistant powered by RAG",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
+# Respostas JSON grandes (ex: /sources) vão comprimidas; o SSE não
+app.add_middleware(SelectiveGZipMiddleware, minimum_size=500, exclude_paths=("/ask/stream",))
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -42,14 +64,25 @@ app.add_middleware(
 )
 
 rag_engine: Optional[RAGEngine] = None
+embedding_batcher: Optional[MicroBatcher] = None
+retrieval_batcher: Optional[MicroBatcher] = None
+semantic_cache: Optional[SemanticCache] = None
+session_store = SessionStore(max_sessions=1000, max_turns=3)
+
+
+def _retrieve_batch(items: List[tuple]) -> List[list]:
+    """Executa um lote de (embedding da pergunta, top_k) no RAG Engine"""
+    query_embeddings = np.stack([query_embedding for query_embedding, _ in items])
+    top_ks = [top_k for _, top_k in items]
+    return rag_engine.retrieve_batch(None, top_ks, query_embeddings)
 
 
 @app.on_event("startup")
 async def startup_event():
     """Inicializa o RAG Engine no startup"""
-    global rag_engine
+    global rag_engine, embedding_batcher, retrieval_batcher, semantic_cache
         
-    chunks_file = Path("data/processed/all_chunks.json")
+    chunks_file = Path("data/processed/all_chunks.parquet")
     if not chunks_file.exists():
         print("⚠️  WARNING: ETL pipeline não foi executado!")
         print("   Execute: python -m backend.etl.pipeline")
@@ -57,9 +90,26 @@ async def startup_event():
     
     print("🚀 Inicializando RAG Engine...")
     rag_engine = RAGEngine()
+    
+    # A pergunta é codificada uma única vez e o embedding é reaproveitado
+    # pelo cache semântico e pelo retrieval, ambos em lote
+    embedding_batcher = MicroBatcher(rag_engine.encode_queries, max_batch_size=32, max_wait_ms=10)
+    embedding_batcher.start()
+    retrieval_batcher = MicroBatcher(_retrieve_batch, max_batch_size=32, max_wait_ms=10)
+    retrieval_batcher.start()
+    
+    semantic_cache = SemanticCache(dim=rag_engine.embeddings.shape[1], max_entries=1000, threshold=0.95)
     print("✅ API pronta!")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Encerra os batchers"""
+    for batcher in (embedding_batcher, retrieval_batcher):
+        if batcher is not None:
+            await batcher.stop()
+
+
 @app.get("/")
 async def root():
     """Health check"""
@@ -95,6 +145,7 @@ async def ask_question(request: QuestionRequest):
     - **question**: A pergunta sobre D&D 5e
     - **top_k**: Número de documentos para usar como contexto (padrão: 5)
     - **temperature**: Temperatura do LLM (0-1, padrão: 0.3)
+    - **session_id**: Id da conversa; as trocas anteriores ficam no servidor
     """
     if rag_engine is None:
         raise HTTPException(
@@ -103,20 +154,153 @@ async def ask_question(request: QuestionRequest):
         )
     
     try:        
-        retrieved_chunks = rag_engine.retrieve(request.question, request.top_k)
+        history = _get_history(request)
+        query_embedding, cache_params, cached = await _check_cache(request, history)
+        if cached is not None:
+            _record_turn(request, cached)
+            return QuestionResponse(**cached)
+        
+        retrieved_chunks = await retrieval_batcher.submit((query_embedding, request.top_k))
                 
-        result = rag_engine.generate_answer(
+        result = await run_in_threadpool(
+            rag_engine.generate_answer,
             request.question,
             retrieved_chunks,
-            request.temperature
+            request.temperature,
+            history
         )
         
+        _cache_result(query_embedding, result, cache_params)
+        _record_turn(request, result)
         return QuestionResponse(**result)
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _get_history(request: QuestionRequest) -> List[tuple]:
+    """Trocas anteriores da conversa (vazio sem session_id)"""
+    if request.session_id is None:
+        return []
+    return session_store.get(request.session_id)
+
+
+def _record_turn(request: QuestionRequest, result: Dict):
+    """Guarda a troca no histórico da sessão, exceto falhas do LLM"""
+    if request.session_id is not None and LLM_ERROR_PREFIX not in result['answer']:
+        session_store.append(request.session_id, request.question, result['answer'])
+
+
+async def _check_cache(request: QuestionRequest, history: List[tuple]) -> tuple:
+    """
+    Consulta o cache semântico para a pergunta
+    
+    A resposta depende também de top_k, temperature e das trocas anteriores
+    da conversa, então eles entram na chave junto com o embedding.
+    
+    Returns:
+        (embedding da pergunta, parâmetros da chave, resposta em cache ou None)
+    """
+    query_embedding = await embedding_batcher.submit(request.question)
+    cache_params = (request.top_k, request.temperature, tuple(history))
+    
+    return query_embedding, cache_params, semantic_cache.get(query_embedding, cache_params)
+
+
+def _cache_result(query_embedding, result: Dict, cache_params: tuple):
+    """Guarda a resposta no cache semântico, exceto falhas do LLM"""
+    if LLM_ERROR_PREFIX not in result['answer']:
+        semantic_cache.put(query_embedding, result, cache_params)
+
+
+def _sse_event(event: str, data: Dict) -> str:
+    """Formata um evento Server-Sent Events"""
+    return f"event: {event}\ndata: {orjson.dumps(data).decode()}\n\n"
+
+
+def _stream_answer(
+    tokens: Iterator[str],
+    sources: List[Dict],
+    on_complete: Optional[Callable[[Dict], None]] = None
+) -> Iterator[str]:
+    """Emite os pedaços da resposta e, por fim, as fontes usadas"""
+    answer_parts = []
+    for token in tokens:
+        answer_parts.append(token)
+        yield _sse_event("token", {"delta": token})
+    
+    yield _sse_event("sources", {"sources": sources, "context_used": len(sources)})
+    
+    if on_complete is not None:
+        on_complete({
+            'answer': "".join(answer_parts).strip(),
+            'sources': sources,
+            'context_used': len(sources)
+        })
+
+
+@app.post("/ask/stream")
+async def ask_question_stream(request: QuestionRequest):
+    """
+    Faz uma pergunta ao assistente, recebendo a resposta via SSE
+    
+    Emite eventos `token` ({"delta": ...}) conforme o LLM gera e um evento
+    final `sources` ({"sources": [...], "context_used": n}).
+    """
+    if rag_engine is None:
+        raise HTTPException(
+            status_code=503,
+            detail="RAG Engine not initialized. Run ETL pipeline first."
+        )
+    
+    try:
+        history = _get_history(request)
+        query_embedding, cache_params, cached = await _check_cache(request, history)
+        if cached is not None:
+            stream = _stream_answer(
+                iter([cached['answer']]),
+                cached['sources'],
+                on_complete=lambda result: _record_turn(request, result)
+            )
+        
+        else:
+            retrieved_chunks = await retrieval_batcher.submit((query_embedding, request.top_k))
+            
+            sources, tokens = rag_engine.generate_answer_stream(
+                request.question,
+                retrieved_chunks,
+                request.temperature,
+                history
+            )
+            
+            def on_complete(result: Dict):
+                _cache_result(query_embedding, result, cache_params)
+                _record_turn(request, result)
+            
+            stream = _stream_answer(tokens, sources, on_complete=on_complete)
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    return StreamingResponse(
+        stream,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.post("/sessions/{session_id}/turns", status_code=204)
+async def record_session_turn(session_id: str, turn: TurnRequest):
+    """
+    Registra no histórico da sessão uma troca respondida pelo cache do cliente
+    
+    Sem isso o próximo prompt da conversa não veria essa troca.
+    """
+    if LLM_ERROR_PREFIX not in turn.answer:
+        session_store.append(session_id, turn.question, turn.answer)
+    return Response(status_code=204)
+
+
 @app.get("/sources/{doc_type}")
 async def list_sources(doc_type: str):
     """
@@ -127,11 +311,7 @@ async def list_sources(doc_type: str):
     if rag_engine is None:
         raise HTTPException(status_code=503, detail="RAG Engine not initialized")
     
-    filtered = [
-        chunk['metadata']
-        for chunk in rag_engine.chunks
-        if chunk['metadata']['type'] == doc_type
-    ]
+    filtered = rag_engine.chunks.filter_by_type(doc_type)
     
     return {
         "type": doc_type,
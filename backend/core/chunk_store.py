@@ -0,0 +1,134 @@
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+import numpy as np
+import orjson
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+METADATA_PREFIX = "metadata."
+
+
+# Tipos explícitos para metadata numérica, sem depender da inferência do
+# Arrow em cada lote. 'cr' mistura int e float (2, 0.25) e fica como
+# double: continua número no JSON de /sources
+METADATA_TYPES = {
+    "level": pa.int64(),
+    "chunk_index": pa.int64(),
+    "cr": pa.float64()
+}
+
+
+# Chaves que todo chunk tem; um lote vazio ainda grava a struct com elas
+BASE_METADATA_KEYS = ("type", "name", "source", "url")
+
+
+def _empty_table() -> pa.Table:
+    metadata = pa.struct([(key, pa.string()) for key in BASE_METADATA_KEYS])
+    return pa.table({
+        "text": pa.array([], type=pa.string()),
+        "metadata": pa.array([], type=metadata),
+        "token_count": pa.array([], type=pa.int32())
+    })
+
+
+def chunks_to_table(chunks: List[Dict]) -> pa.Table:
+    """
+    Converte a lista de chunks em uma tabela Arrow
+
+    A metadata vira uma coluna struct; chaves ausentes em um tipo de
+    documento (ex: 'level' em monstros) ficam nulas. Sem chunks, a
+    tabela sai vazia com as chaves de BASE_METADATA_KEYS.
+    """
+    if not chunks:
+        return _empty_table()
+
+    keys = list(dict.fromkeys(key for chunk in chunks for key in chunk["metadata"]))
+    metadata = pa.StructArray.from_arrays(
+        [
+            pa.array(
+                [chunk["metadata"].get(key) for chunk in chunks],
+                type=METADATA_TYPES.get(key)
+            )
+            for key in keys
+        ],
+        names=keys
+    )
+
+    return pa.table({
+        "text": [chunk["text"] for chunk in chunks],
+        "metadata": metadata,
+        "token_count": pa.array([chunk["token_count"] for chunk in chunks], type=pa.int32())
+    })
+
+
+def write_chunks(chunks: List[Dict], path: Path):
+    """Salva os chunks em Parquet (colunar, zstd)"""
+    pq.write_table(chunks_to_table(chunks), path, compression="zstd")
+
+
+class ChunkStore:
+    """
+    Chunks em Struct-of-Arrays, com acesso estilo lista de dicts
+
+    Cada campo vira uma coluna densa (texts, token_counts e uma coluna
+    por chave de metadata). store[i] monta {'text', 'metadata',
+    'token_count'} como o antigo all_chunks.json, e filtros por tipo
+    usam um índice invertido montado na carga.
+    """
+
+    def __init__(self, table: pa.Table):
+        table = table.flatten()
+
+        self.texts: List[str] = table.column("text").to_pylist()
+        self.token_counts = table.column("token_count").to_numpy()
+        # dtype=object preserva None e inteiros (to_numpy viraria NaN/float)
+        self.metadata_columns: Dict[str, np.ndarray] = {
+            name[len(METADATA_PREFIX):]: np.array(table.column(name).to_pylist(), dtype=object)
+            for name in table.column_names
+            if name.startswith(METADATA_PREFIX)
+        }
+        self.types = self.metadata_columns["type"]
+
+        # Índice invertido tipo -> posições, montado uma vez na carga
+        self.by_type: Dict[str, np.ndarray] = {
+            doc_type: np.flatnonzero(self.types == doc_type)
+            for doc_type in set(self.types.tolist())
+        }
+
+    @classmethod
+    def from_file(cls, path: Path) -> "ChunkStore":
+        """Carrega Parquet via memory map (ou o JSON legado)"""
+        path = Path(path)
+        if path.suffix == ".json":
+            with open(path, 'rb') as f:
+                return cls(chunks_to_table(orjson.loads(f.read())))
+
+        return cls(pq.read_table(path, memory_map=True))
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def __iter__(self) -> Iterator[Dict]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def __getitem__(self, idx: int) -> Dict:
+        return {
+            "text": self.texts[idx],
+            "metadata": self.metadata_at(idx),
+            "token_count": int(self.token_counts[idx])
+        }
+
+    def metadata_at(self, idx: int) -> Dict:
+        """Metadata de um chunk, só com as chaves do seu tipo"""
+        metadata = {}
+        for key, column in self.metadata_columns.items():
+            value = column[idx]
+            if value is not None:
+                metadata[key] = value
+        return metadata
+
+    def filter_by_type(self, doc_type: str) -> List[Dict]:
+        """Metadata de todos os chunks de um tipo, em O(tamanho do resultado)"""
+        return [self.metadata_at(idx) for idx in self.by_type.get(doc_type, ())]
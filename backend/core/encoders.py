@@ -0,0 +1,151 @@
+from pathlib import Path
+from typing import List
+
+import numpy as np
+from tqdm import tqdm
+
+try:
+    import onnxruntime as ort
+    from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer
+except ImportError:
+    ort = None
+
+QUANTIZED_MODEL_FILE = "model_quantized.onnx"
+
+# Granularidade (em tokens) dos buckets de comprimento e do padding
+PAD_MULTIPLE = 16
+
+
+class ONNXSentenceEncoder:
+    """
+    Encoder de sentenças em ONNX Runtime com pesos int8
+
+    Exporta o modelo do Hugging Face para ONNX e aplica quantização
+    dinâmica int8 uma única vez (cacheado em disco); a inferência usa
+    GEMMs inteiros (VNNI em x86 moderno). Faz o mesmo mean pooling do
+    sentence-transformers e expõe a mesma interface de `encode`.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+        cache_dir: str = "data/models",
+        quantization: str = "avx512_vnni",
+        max_seq_length: int = 256
+    ):
+        if ort is None:
+            raise ImportError("ONNX backend requires: pip install optimum[onnxruntime]")
+
+        self.model_dir = Path(cache_dir) / f"{model_name.replace('/', '__')}-onnx-{quantization}"
+        self.max_seq_length = max_seq_length
+
+        if not (self.model_dir / QUANTIZED_MODEL_FILE).exists():
+            self._export_and_quantize(model_name, quantization)
+
+        self.tokenizer = AutoTokenizer.from_pretrained(self.model_dir)
+        self.session = ort.InferenceSession(
+            str(self.model_dir / QUANTIZED_MODEL_FILE),
+            providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+    def _export_and_quantize(self, model_name: str, quantization: str):
+        """Exporta para ONNX e quantiza para int8 (só na primeira execução)"""
+        print(f"📦 Exportando {model_name} para ONNX int8 ({quantization})...")
+        model = ORTModelForFeatureExtraction.from_pretrained(model_name, export=True)
+        model.save_pretrained(self.model_dir)
+        AutoTokenizer.from_pretrained(model_name).save_pretrained(self.model_dir)
+
+        quantizer = ORTQuantizer.from_pretrained(model)
+        config = getattr(AutoQuantizationConfig, quantization)(is_static=False, per_channel=False)
+        quantizer.quantize(save_dir=self.model_dir, quantization_config=config)
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return int(self.session.get_outputs()[0].shape[-1])
+
+    def encode(
+        self,
+        sentences: List[str],
+        batch_size: int = 128,
+        show_progress_bar: bool = False,
+        convert_to_numpy: bool = True,
+        normalize_embeddings: bool = False
+    ) -> np.ndarray:
+        """
+        Gera embeddings (N, d) float32, como SentenceTransformer.encode
+
+        Os textos são pré-tokenizados numa única chamada em lote (o
+        tokenizer rápido já paraleliza internamente) e agrupados por
+        comprimento (em blocos de PAD_MULTIPLE tokens) para minimizar o
+        padding de cada batch; a saída volta na ordem original.
+        """
+        dim = self.get_sentence_embedding_dimension()
+        embeddings = np.empty((len(sentences), dim), dtype=np.float32)
+        if not sentences:
+            return embeddings
+
+        token_ids = self._tokenize(sentences)
+        buckets = np.array([-(-len(ids) // PAD_MULTIPLE) for ids in token_ids])
+        order = np.argsort(buckets, kind="stable")
+
+        batches = range(0, len(sentences), batch_size)
+        for start in tqdm(batches, desc="Batches", disable=not show_progress_bar):
+            indices = order[start:start + batch_size]
+            embeddings[indices] = self._encode_batch([token_ids[i] for i in indices])
+
+        if normalize_embeddings:
+            embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True) + 1e-12
+
+        return embeddings
+
+    def _tokenize(self, sentences: List[str]) -> List[List[int]]:
+        """Tokeniza sem padding, numa única chamada em lote"""
+        return self.tokenizer(sentences, truncation=True, max_length=self.max_seq_length)["input_ids"]
+
+    def _encode_batch(self, token_ids: List[List[int]]) -> np.ndarray:
+        # Comprimento arredondado para PAD_MULTIPLE: menos formas distintas
+        seq_len = -(-max(len(ids) for ids in token_ids) // PAD_MULTIPLE) * PAD_MULTIPLE
+        input_ids = np.full((len(token_ids), seq_len), self.tokenizer.pad_token_id, dtype=np.int64)
+        attention_mask = np.zeros((len(token_ids), seq_len), dtype=np.int64)
+        for row, ids in enumerate(token_ids):
+            input_ids[row, :len(ids)] = ids
+            attention_mask[row, :len(ids)] = 1
+
+        inputs = {
+            "input_ids": input_ids,
+            "attention_mask": attention_mask,
+            "token_type_ids": np.zeros_like(input_ids)
+        }
+        feed = {name: array for name, array in inputs.items() if name in self.input_names}
+        token_embeddings = self.session.run(None, feed)[0]
+
+        # Mean pooling sobre os tokens reais (ignora padding)
+        mask = attention_mask[..., None].astype(np.float32)
+        summed = (token_embeddings * mask).sum(axis=1)
+        return summed / np.clip(mask.sum(axis=1), 1e-9, None)
+
+
+def load_embedding_model(model_name: str, backend: str = "onnx"):
+    """
+    Carrega o modelo de embeddings
+
+    Args:
+        model_name: Modelo do Hugging Face
+        backend: "onnx" (ONNX Runtime int8) ou "torch" (sentence-transformers fp32);
+            "onnx" cai para "torch" se optimum/onnxruntime não estiverem instalados
+    """
+    if backend == "onnx":
+        if ort is not None:
+            return ONNXSentenceEncoder(model_name)
+        print("⚠️  optimum[onnxruntime] não instalado, usando sentence-transformers (fp32)")
+        print("   Os embeddings da base precisam ter sido gerados com o mesmo backend")
+
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name)
+
+
+def embedding_backend_of(model) -> str:
+    """Backend efetivamente usado por um modelo de load_embedding_model"""
+    return "onnx" if isinstance(model, ONNXSentenceEncoder) else "torch"
@@ -1,9 +1,41 @@
-import json
 import numpy as np
+import orjson
 from pathlib import Path
-from typing import List, Dict, Tuple
-from sentence_transformers import SentenceTransformer
+from typing import List, Dict, Tuple, Optional, Iterator
 import requests
+from requests.adapters import HTTPAdapter
+
+from backend.core.chunk_store import ChunkStore
+from backend.core.encoders import embedding_backend_of, load_embedding_model
+from backend.utils.vectors import aligned_empty, is_aligned, quantize_int8
+
+try:
+    import simsimd
+except ImportError:
+    simsimd = None
+
+try:
+    import faiss
+except ImportError:
+    faiss = None
+
+# Prefixo das respostas quando a chamada ao LLM falha
+LLM_ERROR_PREFIX = "Error calling LLM"
+
+# Candidatos explorados por busca HNSW (maior = mais recall, mais lento)
+HNSW_EF_SEARCH = 64
+
+# Linhas de embeddings convertidas para float32 por vez no fallback NumPy
+SIMILARITY_BLOCK_ROWS = 8192
+
+
+def _fit_columns(matrix: np.ndarray, dim: int) -> np.ndarray:
+    """Corta ou completa com zeros as colunas (de padding) até `dim`"""
+    if matrix.shape[1] >= dim:
+        return np.ascontiguousarray(matrix[:, :dim], dtype=np.float32)
+    fitted = np.zeros((len(matrix), dim), dtype=np.float32)
+    fitted[:, :matrix.shape[1]] = matrix
+    return fitted
 
 
 class RAGEngine:
@@ -11,76 +43,249 @@ class RAGEngine:
     
     def __init__(
         self,
-        chunks_file: str = "data/processed/all_chunks.json",
+        chunks_file: str = "data/processed/all_chunks.parquet",
         embeddings_file: str = "data/embeddings/embeddings.npy",
+        quantized_embeddings_file: str = "data/embeddings/embeddings_i8.npy",
+        quantization_file: str = "data/embeddings/quantization.json",
         metadata_file: str = "data/embeddings/metadata.json",
+        index_file: str = "data/embeddings/index_hnsw.faiss",
         embedding_model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+        embedding_backend: str = "onnx",
         llm_url: str = "http://localhost:11434/api/generate",
         llm_model: str = "phi3:mini"
     ):
         self.chunks_file = Path(chunks_file)
         self.embeddings_file = Path(embeddings_file)
+        self.quantized_embeddings_file = Path(quantized_embeddings_file)
+        self.quantization_file = Path(quantization_file)
         self.metadata_file = Path(metadata_file)
+        self.index_file = Path(index_file)
         
         self.llm_url = llm_url
         self.llm_model = llm_model
+        
+        # Conexões keep-alive reaproveitadas entre chamadas ao Ollama
+        self.llm_session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32)
+        self.llm_session.mount("http://", adapter)
+        self.llm_session.mount("https://", adapter)
                 
         print("📚 Carregando base de conhecimento...")
         self.chunks = self._load_chunks()
+        self.embeddings_scale = self._load_embeddings_scale()
         self.embeddings = self._load_embeddings()
         self.metadata = self._load_metadata()
+        self.index = self._load_index()
                 
         print(f"🤖 Carregando modelo de embeddings...")
-        self.embedding_model = SentenceTransformer(embedding_model_name)
+        # Mesmo backend do ETL: os vetores da base e da query precisam
+        # vir do mesmo modelo (int8 ou fp32)
+        self.embedding_model = load_embedding_model(embedding_model_name, embedding_backend)
+        self._check_encoder(embedding_model_name)
         
         print(f"✅ RAG Engine inicializada!")
         print(f"   📊 {len(self.chunks)} chunks carregados")
         print(f"   🧮 Embeddings shape: {self.embeddings.shape}")
+        print(f"   🔎 Busca: {'HNSW (FAISS)' if self.index is not None else 'exaustiva'}")
+    
+    def _load_chunks(self) -> ChunkStore:
+        """Carrega chunks processados (Parquet via memory map)"""
+        return ChunkStore.from_file(self.chunks_file)
+    
+    def _load_embeddings_scale(self) -> Optional[float]:
+        """
+        Escala dos embeddings int8, ou None para usar float32
+        
+        O caminho int8 depende do produto escalar inteiro do SimSIMD;
+        sem ele, o NumPy faria upcast da matriz inteira a cada query.
+        """
+        if simsimd is None:
+            return None
+        if not (self.quantized_embeddings_file.exists() and self.quantization_file.exists()):
+            return None
+        
+        with open(self.quantization_file, 'rb') as f:
+            return float(orjson.loads(f.read())['scale'])
     
-    def _load_chunks(self) -> List[Dict]:
-        """Carrega chunks processados"""
-        with open(self.chunks_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
+    def _check_encoder(self, embedding_model_name: str):
+        """Avisa se o encoder das queries difere do usado no ETL para a base"""
+        if not self.quantization_file.exists():
+            return
+        
+        with open(self.quantization_file, 'rb') as f:
+            info = orjson.loads(f.read())
+        
+        expected = (info.get('embedding_model'), info.get('embedding_backend'))
+        actual = (embedding_model_name, embedding_backend_of(self.embedding_model))
+        if None not in expected and expected != actual:
+            print(f"⚠️  Encoder das queries ({actual[0]}, {actual[1]}) difere do usado "
+                  f"no ETL ({expected[0]}, {expected[1]}): a busca pode perder qualidade")
+            print("   Rode o ETL novamente ou use o mesmo embedding_backend")
     
     def _load_embeddings(self) -> np.ndarray:
-        """Carrega embeddings"""
-        return np.load(self.embeddings_file)
+        """
+        Carrega embeddings via memory map
+        
+        O arquivo não é materializado em RAM: o SO pagina sob demanda e
+        as páginas residentes ficam limitadas ao working set.
+        """
+        if self.embeddings_scale is not None:
+            embeddings = np.load(self.quantized_embeddings_file, mmap_mode='r')
+        else:
+            embeddings = np.load(self.embeddings_file, mmap_mode='r')
+        
+        # Kernels SIMD/BLAS exigem C-order e um dtype nativo; arquivos fora
+        # disso (ex: float64 ou Fortran-order legados) são materializados
+        # uma única vez como float32 contíguo
+        if not embeddings.flags.c_contiguous or embeddings.dtype not in (np.int8, np.float16, np.float32):
+            embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        
+        # Arquivos de versões antigas do NumPy (header de 16 bytes) ou
+        # arrays materializados acima podem vir desalinhados
+        if not is_aligned(embeddings):
+            aligned = aligned_empty(embeddings.shape, embeddings.dtype)
+            aligned[:] = embeddings
+            embeddings = aligned
+        
+        return embeddings
+    
+    def _load_index(self):
+        """Carrega o índice HNSW do FAISS, se existir; None = busca exaustiva"""
+        if faiss is None or not self.index_file.exists():
+            return None
+        
+        index = faiss.read_index(str(self.index_file))
+        index.hnsw.efSearch = HNSW_EF_SEARCH
+        return index
     
     def _load_metadata(self) -> List[Dict]:
         """Carrega metadata"""
-        with open(self.metadata_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        with open(self.metadata_file, 'rb') as f:
+            return orjson.loads(f.read())
     
-    def retrieve(self, query: str, top_k: int = 5) -> List[Tuple[Dict, float]]:
+    def retrieve(
+        self,
+        query: Optional[str] = None,
+        top_k: int = 5,
+        query_embedding: Optional[np.ndarray] = None
+    ) -> List[Tuple[Dict, float]]:
         """
         Busca semântica: encontra os chunks mais relevantes
         
         Args:
             query: Pergunta do usuário
             top_k: Número de chunks para retornar
+            query_embedding: Embedding já calculado (de encode_queries);
+                se informado, a pergunta não é codificada de novo
             
         Returns:
             Lista de (chunk, score de similaridade)
         """        
-        query_embedding = self.embedding_model.encode([query])[0]
-                
-        similarities = np.dot(self.embeddings, query_embedding)
-                
-        top_indices = np.argsort(similarities)[-top_k:][::-1]
+        if query_embedding is None:
+            return self.retrieve_batch([query], [top_k])[0]
+        
+        return self.retrieve_batch(None, [top_k], query_embedding.reshape(1, -1))[0]
+    
+    def retrieve_batch(
+        self,
+        queries: Optional[List[str]],
+        top_ks: List[int],
+        query_embeddings: Optional[np.ndarray] = None
+    ) -> List[List[Tuple[Dict, float]]]:
+        """
+        Busca semântica para várias perguntas de uma vez
+        
+        Um único encode e um único GEMM atendem todas as perguntas.
+        
+        Args:
+            queries: Perguntas dos usuários
+            top_ks: Número de chunks para retornar, por pergunta
+            query_embeddings: Embeddings já calculados (B, d); se
+                informados, queries é ignorado
+            
+        Returns:
+            Uma lista de (chunk, score de similaridade) por pergunta
+        """
+        if query_embeddings is None:
+            query_embeddings = self.encode_queries(queries)
+        
+        top_scores, top_indices = self._search(query_embeddings, max(top_ks))
         
         results = []
-        for idx in top_indices:
-            chunk = self.chunks[idx]
-            score = float(similarities[idx])
-            results.append((chunk, score))
+        for indices, scores, top_k in zip(top_indices, top_scores, top_ks):
+            results.append([
+                (self.chunks[idx], float(score))
+                for idx, score in zip(indices[:top_k], scores[:top_k])
+                if idx >= 0
+            ])
         
         return results
     
+    def _search(self, query_embeddings: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k por pergunta, do mais para o menos similar
+        
+        Usa o índice HNSW (FAISS) quando disponível; senão, busca exaustiva.
+        
+        Returns:
+            (scores, índices), ambos (B, k); índice -1 quando faltam vizinhos
+        """
+        if self.index is not None:
+            # O padding da matriz int8 pode diferir do usado no índice; as
+            # colunas extras são zeros, então basta ajustar a largura
+            return self.index.search(_fit_columns(query_embeddings, self.index.d), k)
+        
+        similarities = self._similarities(query_embeddings)
+        
+        # Seleção O(N) dos top-k e ordenação só desses k elementos
+        k = min(k, similarities.shape[1])
+        top_indices = np.argpartition(similarities, -k, axis=1)[:, -k:]
+        top_scores = np.take_along_axis(similarities, top_indices, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        return (
+            np.take_along_axis(top_scores, order, axis=1),
+            np.take_along_axis(top_indices, order, axis=1)
+        )
+    
+    def encode_queries(self, queries: List[str]) -> np.ndarray:
+        """Gera embeddings normalizados (float32) para as perguntas"""
+        query_embeddings = self.embedding_model.encode(queries, convert_to_numpy=True)
+        
+        # Embeddings da base já são normalizados no ETL: dot == coseno
+        norms = np.linalg.norm(query_embeddings, axis=1, keepdims=True)
+        query_embeddings = query_embeddings / (norms + 1e-12)
+        
+        # Mesmo padding de colunas (zeros) aplicado à base no ETL
+        padded = np.zeros((len(query_embeddings), self.embeddings.shape[1]), dtype=np.float32)
+        padded[:, :query_embeddings.shape[1]] = query_embeddings
+        return padded
+    
+    def _similarities(self, query_embeddings: np.ndarray) -> np.ndarray:
+        """Produto escalar entre as queries (B, d) e todos os embeddings: (B, N)"""
+        if self.embeddings_scale is not None:
+            queries_i8, query_scales = quantize_int8(query_embeddings, axis=1)
+            dots = np.asarray(simsimd.cdist(queries_i8, self.embeddings, metric="dot"))
+            return dots * (self.embeddings_scale * query_scales)
+        
+        if simsimd is not None:
+            # SimSIMD consome float16 direto (nativo em CPUs com AVX-512 FP16)
+            queries = query_embeddings.astype(self.embeddings.dtype)
+            return np.asarray(simsimd.cdist(queries, self.embeddings, metric="dot"))
+        
+        # Sem SimSIMD: converte para float32 um bloco por vez dentro do GEMM
+        similarities = np.empty((len(query_embeddings), len(self.embeddings)), dtype=np.float32)
+        for start in range(0, len(self.embeddings), SIMILARITY_BLOCK_ROWS):
+            block = self.embeddings[start:start + SIMILARITY_BLOCK_ROWS].astype(np.float32, copy=False)
+            similarities[:, start:start + len(block)] = np.dot(query_embeddings, block.T)
+        
+        return similarities
+    
     def generate_answer(
         self,
         query: str,
         context_chunks: List[Tuple[Dict, float]],
-        temperature: float = 0.3
+        temperature: float = 0.3,
+        history: Optional[List[Tuple[str, str]]] = None
     ) -> Dict:
         """
         Gera resposta usando LLM com contexto recuperado
@@ -89,7 +294,44 @@ class RAGEngine:
             query: Pergunta do usuário
             context_chunks: Chunks recuperados com scores
             temperature: Temperatura do LLM (0-1, menor = mais determinístico)
+            history: Trocas (pergunta, resposta) anteriores da conversa
         """        
+        context, sources = self._build_context(context_chunks)
+                
+        prompt = self._build_prompt(query, context, history)
+            
+        answer = self._call_llm(prompt, temperature)
+        
+        return {
+            'answer': answer,
+            'sources': sources,
+            'context_used': len(context_chunks)
+        }
+    
+    def generate_answer_stream(
+        self,
+        query: str,
+        context_chunks: List[Tuple[Dict, float]],
+        temperature: float = 0.3,
+        history: Optional[List[Tuple[str, str]]] = None
+    ) -> Tuple[List[Dict], Iterator[str]]:
+        """
+        Versão streaming de generate_answer
+        
+        Returns:
+            (fontes, iterador com os pedaços da resposta conforme o LLM gera)
+        """
+        context, sources = self._build_context(context_chunks)
+        
+        prompt = self._build_prompt(query, context, history)
+        
+        return sources, self._call_llm_stream(prompt, temperature)
+    
+    def _build_context(
+        self,
+        context_chunks: List[Tuple[Dict, float]]
+    ) -> Tuple[str, List[Dict]]:
+        """Monta o contexto do prompt e a lista de fontes citáveis"""
         context_parts = []
         sources = []
         
@@ -109,20 +351,23 @@ class RAGEngine:
             }
             sources.append(source)
         
-        context = "\n".join(context_parts)
-                
-        prompt = self._build_prompt(query, context)
-            
-        answer = self._call_llm(prompt, temperature)
-        
-        return {
-            'answer': answer,
-            'sources': sources,
-            'context_used': len(context_chunks)
-        }
+        return "\n".join(context_parts), sources
     
-    def _build_prompt(self, query: str, context: str) -> str:
-        """Constrói o prompt para o LLM"""
+    def _build_prompt(
+        self,
+        query: str,
+        context: str,
+        history: Optional[List[Tuple[str, str]]] = None
+    ) -> str:
+        """Constrói o prompt para o LLM (com as trocas anteriores, se houver)"""
+        conversation = ""
+        if history:
+            turns = "\n".join(f"User: {question}\nSage: {answer}" for question, answer in history)
+            conversation = f"""
+CONVERSATION SO FAR:
+{turns}
+"""
+        
         return f"""You are Sage, a knowledgeable assistant for Dungeons & Dragons 5th Edition rules.
 
 Your role is to answer questions about D&D rules, spells, and monsters using ONLY the information provided in the documents below.
@@ -136,7 +381,7 @@ IMPORTANT RULES:
 
 DOCUMENTS:
 {context}
-
+{conversation}
 QUESTION: {query}
 
 ANSWER:"""
@@ -160,14 +405,58 @@ ANSWER:"""
                 }
             }
             
-            response = requests.post(self.llm_url, json=payload, timeout=60)
+            response = self.llm_session.post(self.llm_url, json=payload, timeout=60)
             response.raise_for_status()
             
-            result = response.json()
+            result = orjson.loads(response.content)
             return result.get('response', '').strip()
         
-        except requests.exceptions.RequestException as e:
-            return f"Error calling LLM: {str(e)}"
+        except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
+            return f"{LLM_ERROR_PREFIX}: {str(e)}"
+    
+    def _call_llm_stream(self, prompt: str, temperature: float = 0.3) -> Iterator[str]:
+        """
+        Chama o LLM (Ollama) em modo streaming
+        
+        Ollama envia um JSON por linha; cada um traz um pedaço em 'response'
+        e o último vem com 'done': true.
+        
+        Args:
+            prompt: Prompt completo
+            temperature: Temperatura (0-1)
+        """
+        payload = {
+            "model": self.llm_model,
+            "prompt": prompt,
+            "stream": True,
+            "options": {
+                "temperature": temperature,
+                "num_predict": 500
+            }
+        }
+        
+        try:
+            with self.llm_session.post(self.llm_url, json=payload, stream=True, timeout=60) as response:
+                response.raise_for_status()
+                
+                started = False
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    
+                    chunk = orjson.loads(line)
+                    token = chunk.get('response', '')
+                    if not started:
+                        token = token.lstrip()
+                        started = bool(token)
+                    if token:
+                        yield token
+                    
+                    if chunk.get('done'):
+                        break
+        
+        except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
+            yield f"{LLM_ERROR_PREFIX}: {str(e)}"
     
     def ask(self, query: str, top_k: int = 5) -> Dict:
         """
@@ -0,0 +1,65 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+import numpy as np
+
+
+class SemanticCache:
+    """
+    Cache LRU de respostas indexado pelo embedding da pergunta
+
+    Perguntas parafraseadas ("how does Fireball work?" vs "tell me about
+    Fireball") têm embeddings quase idênticos; acima do limiar de
+    similaridade coseno a resposta guardada é reaproveitada sem
+    retrieval nem LLM. Os embeddings devem estar normalizados.
+    """
+
+    def __init__(self, dim: int, max_entries: int = 1000, threshold: float = 0.95):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._keys = np.zeros((max_entries, dim), dtype=np.float32)
+        self._values: Dict[int, Any] = {}
+        self._params: Dict[int, Hashable] = {}
+        self._lru: "OrderedDict[int, None]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._lru)
+
+    def get(self, embedding: np.ndarray, params: Hashable = None) -> Optional[Any]:
+        """
+        Busca uma resposta para uma pergunta semanticamente equivalente
+
+        Args:
+            embedding: Embedding normalizado da pergunta
+            params: Parâmetros que também precisam coincidir (ex: top_k)
+        """
+        with self._lock:
+            used = len(self._lru)
+            if used == 0:
+                return None
+
+            scores = self._keys[:used] @ embedding
+            candidates = np.flatnonzero(scores >= self.threshold)
+
+            for slot in candidates[np.argsort(-scores[candidates])]:
+                slot = int(slot)
+                if self._params[slot] == params:
+                    self._lru.move_to_end(slot)
+                    return self._values[slot]
+
+        return None
+
+    def put(self, embedding: np.ndarray, value: Any, params: Hashable = None):
+        """Guarda uma resposta, descartando a menos usada se estiver cheio"""
+        with self._lock:
+            if len(self._lru) < self.max_entries:
+                slot = len(self._lru)
+            else:
+                slot, _ = self._lru.popitem(last=False)
+
+            self._keys[slot] = embedding
+            self._values[slot] = value
+            self._params[slot] = params
+            self._lru[slot] = None
@@ -0,0 +1,43 @@
+import threading
+from collections import OrderedDict, deque
+from typing import Deque, List, Tuple
+
+
+class SessionStore:
+    """
+    Histórico recente de cada conversa, mantido no servidor por session_id
+
+    O cliente envia só a pergunta nova; as últimas trocas (pergunta,
+    resposta) da sessão ficam aqui e entram no prompt. Sessões inativas
+    são descartadas em ordem LRU.
+    """
+
+    def __init__(self, max_sessions: int = 1000, max_turns: int = 3):
+        self.max_sessions = max_sessions
+        self.max_turns = max_turns
+        self._sessions: "OrderedDict[str, Deque[Tuple[str, str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get(self, session_id: str) -> List[Tuple[str, str]]:
+        """Trocas (pergunta, resposta) mais recentes da sessão, da mais antiga à mais nova"""
+        with self._lock:
+            turns = self._sessions.get(session_id)
+            if turns is None:
+                return []
+            self._sessions.move_to_end(session_id)
+            return list(turns)
+
+    def append(self, session_id: str, question: str, answer: str):
+        """Registra uma troca, descartando a sessão menos usada se estiver cheio"""
+        with self._lock:
+            turns = self._sessions.get(session_id)
+            if turns is None:
+                turns = self._sessions[session_id] = deque(maxlen=self.max_turns)
+            self._sessions.move_to_end(session_id)
+            turns.append((question, answer))
+
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
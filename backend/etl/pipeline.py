@@ -1,12 +1,23 @@
-import json
+from backend.utils.blas import configure_blas_threads
+
+configure_blas_threads()
+
+import orjson
 from pathlib import Path
 from typing import List, Dict
 import numpy as np
-from sentence_transformers import SentenceTransformer
 from tqdm import tqdm
 
+try:
+    import faiss
+except ImportError:
+    faiss = None
+
+from backend.core.chunk_store import write_chunks
+from backend.core.encoders import embedding_backend_of, load_embedding_model
 from backend.etl.scrapers.srd_scraper import SRDScraper
-from backend.utils.chunking import TextChunker
+from backend.utils.chunking import get_chunker
+from backend.utils.vectors import pad_columns, quantize_int8
 
 class ETLPipeline:    
     
@@ -14,7 +25,8 @@ class ETLPipeline:
         self,
         raw_data_dir: str = "data/raw",
         processed_data_dir: str = "data/processed",
-        embeddings_dir: str = "data/embeddings"
+        embeddings_dir: str = "data/embeddings",
+        embedding_backend: str = "onnx"
     ):
         self.raw_data_dir = Path(raw_data_dir)
         self.processed_data_dir = Path(processed_data_dir)
@@ -24,13 +36,16 @@ class ETLPipeline:
         self.embeddings_dir.mkdir(parents=True, exist_ok=True)
                 
         self.scraper = SRDScraper(output_dir=str(self.raw_data_dir))
-        self.chunker = TextChunker()
+        self.chunker = get_chunker()
+        self.embedding_backend = embedding_backend
         self.embedding_model = None
+        self.embedding_model_name = None
     
     def load_embedding_model(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2"):
         """Carrega modelo de embeddings"""
-        print(f"📥 Carregando modelo de embeddings: {model_name}")
-        self.embedding_model = SentenceTransformer(model_name)
+        print(f"📥 Carregando modelo de embeddings: {model_name} ({self.embedding_backend})")
+        self.embedding_model = load_embedding_model(model_name, self.embedding_backend)
+        self.embedding_model_name = model_name
         print(f"✅ Modelo carregado! Dimensão: {self.embedding_model.get_sentence_embedding_dimension()}")
     
     def step_1_scrape_data(self):
@@ -52,8 +67,8 @@ class ETLPipeline:
         spells_file = self.raw_data_dir / "spells.json"
         if spells_file.exists():
             print("\n🔮 Processando magias...")
-            with open(spells_file, 'r', encoding='utf-8') as f:
-                spells = json.load(f)
+            with open(spells_file, 'rb') as f:
+                spells = orjson.loads(f.read())
             
             for spell in tqdm(spells, desc="Chunking spells"):
                 chunk = self.chunker.chunk_spell(spell)
@@ -64,8 +79,8 @@ class ETLPipeline:
         monsters_file = self.raw_data_dir / "monsters.json"
         if monsters_file.exists():
             print("\n👹 Processando monstros...")
-            with open(monsters_file, 'r', encoding='utf-8') as f:
-                monsters = json.load(f)
+            with open(monsters_file, 'rb') as f:
+                monsters = orjson.loads(f.read())
             
             for monster in tqdm(monsters, desc="Chunking monsters"):
                 chunk = self.chunker.chunk_monster(monster)
@@ -76,18 +91,23 @@ class ETLPipeline:
         rules_file = self.raw_data_dir / "rules.json"
         if rules_file.exists():
             print("\n📜 Processando regras...")
-            with open(rules_file, 'r', encoding='utf-8') as f:
-                rules = json.load(f)
+            with open(rules_file, 'rb') as f:
+                rules = orjson.loads(f.read())
             
             for rule in tqdm(rules, desc="Chunking rules"):
                 rule_chunks = self.chunker.chunk_rule_section(rule)
                 all_chunks.extend(rule_chunks)
             
             print(f"✅ {len(rules)} seções de regras processadas")
+        
+        # Magias e monstros são contados de uma vez só (regras já vêm contadas)
+        pending = [chunk for chunk in all_chunks if 'token_count' not in chunk]
+        token_counts = self.chunker.count_tokens_batch([chunk['text'] for chunk in pending])
+        for chunk, token_count in zip(pending, token_counts):
+            chunk['token_count'] = token_count
                 
-        chunks_file = self.processed_data_dir / "all_chunks.json"
-        with open(chunks_file, 'w', encoding='utf-8') as f:
-            json.dump(all_chunks, f, indent=2, ensure_ascii=False)
+        chunks_file = self.processed_data_dir / "all_chunks.parquet"
+        write_chunks(all_chunks, chunks_file)
         
         print(f"\n💾 Total de chunks criados: {len(all_chunks)}")
         print(f"💾 Salvos em: {chunks_file}")
@@ -109,13 +129,35 @@ class ETLPipeline:
         embeddings = self.embedding_model.encode(
             texts,
             show_progress_bar=True,
-            batch_size=32
+            batch_size=128,
+            normalize_embeddings=True
         )
                 
         embeddings_file = self.embeddings_dir / "embeddings.npy"
+        quantized_file = self.embeddings_dir / "embeddings_i8.npy"
+        quantization_file = self.embeddings_dir / "quantization.json"
         metadata_file = self.embeddings_dir / "metadata.json"
         
-        np.save(embeddings_file, embeddings)
+        # float16 pela metade da memória; a API carrega via memory map.
+        # O header .npy tem 64 bytes de alinhamento e o mmap começa numa
+        # página, então com linhas de múltiplos de 64 B todo o acesso
+        # dos kernels SIMD fica alinhado
+        embeddings_fp16 = pad_columns(embeddings.astype(np.float16))
+        np.save(embeddings_file, embeddings_fp16)
+        
+        # Versão int8 (4x menor) para o produto escalar inteiro do SimSIMD
+        quantized, scale = quantize_int8(embeddings)
+        np.save(quantized_file, pad_columns(quantized))
+        # Modelo e backend de encoder usados: a API confere na carga, já que
+        # queries de outro backend (int8 vs fp32) não casam com a base
+        encoder_info = {
+            'dtype': 'int8',
+            'scale': scale,
+            'embedding_model': self.embedding_model_name,
+            'embedding_backend': embedding_backend_of(self.embedding_model)
+        }
+        with open(quantization_file, 'wb') as f:
+            f.write(orjson.dumps(encoder_info, option=orjson.OPT_INDENT_2))
                 
         metadata = [
             {
@@ -126,13 +168,34 @@ class ETLPipeline:
             for i, chunk in enumerate(chunks)
         ]
         
-        with open(metadata_file, 'w', encoding='utf-8') as f:
-            json.dump(metadata, f, indent=2, ensure_ascii=False)
+        with open(metadata_file, 'wb') as f:
+            f.write(orjson.dumps(metadata, option=orjson.OPT_INDENT_2))
         
         print(f"✅ Embeddings salvos: {embeddings_file}")
+        print(f"✅ Embeddings int8 salvos: {quantized_file} (escala {scale:.6f})")
+        
+        if faiss is not None:
+            index_file = self.embeddings_dir / "index_hnsw.faiss"
+            self.build_hnsw_index(embeddings, index_file, dim=embeddings_fp16.shape[1])
+            print(f"✅ Índice HNSW salvo: {index_file}")
         print(f"✅ Metadata salva: {metadata_file}")
         print(f"📊 Shape dos embeddings: {embeddings.shape}")
     
+    def build_hnsw_index(self, embeddings: np.ndarray, index_file: Path, dim: int, m: int = 32):
+        """
+        Constrói o índice HNSW (FAISS) para busca aproximada em O(log N)
+        
+        Os embeddings são normalizados, então produto interno == coseno.
+        As colunas são completadas com zeros até `dim`, a largura da matriz
+        salva em embeddings.npy (a mesma das queries na API).
+        """
+        vectors = np.zeros((len(embeddings), dim), dtype=np.float32)
+        vectors[:, :embeddings.shape[1]] = embeddings
+        index = faiss.IndexHNSWFlat(vectors.shape[1], m, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = 200
+        index.add(vectors)
+        faiss.write_index(index, str(index_file))
+    
     def run_full_pipeline(self):        
         print("\n" + "🎲"*30)
         print("SAGE'S ORACLE - ETL PIPELINE")
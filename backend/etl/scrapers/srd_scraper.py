@@ -1,14 +1,22 @@
+import orjson
 import requests
-import json
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List
 from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
 from tqdm import tqdm
 
 
 class SRDScraper:
-    def __init__(self, output_dir: str = "data/raw"):
+    def __init__(
+        self,
+        output_dir: str = "data/raw",
+        max_workers: int = 16,
+        requests_per_second: float = 20.0
+    ):
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)        
         self.base_urls = {
@@ -19,18 +27,36 @@ class SRDScraper:
             "equipment": "https://www.dnd5eapi.co/api/equipment"
         }
         
+        self.max_workers = max_workers
+        self.min_interval = 1.0 / requests_per_second
+        self._rate_lock = threading.Lock()
+        self._next_request_at = 0.0
+        
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'SagesOracle/1.0 (Educational Project)'
         })
+        # Uma conexão keep-alive por worker
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount("https://", adapter)
+    
+    def _throttle(self):
+        """Limite global de requisições/s compartilhado entre os workers"""
+        with self._rate_lock:
+            now = time.monotonic()
+            wait = self._next_request_at - now
+            self._next_request_at = max(now, self._next_request_at) + self.min_interval
+        
+        if wait > 0:
+            time.sleep(wait)
     
-    def fetch_json(self, url: str, delay: float = 0.5) -> Dict:
+    def fetch_json(self, url: str) -> Dict:
         try:
-            time.sleep(delay)
+            self._throttle()
             response = self.session.get(url, timeout=10)
             response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
+            return orjson.loads(response.content)
+        except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
             print(f"❌ Erro ao buscar {url}: {e}")
             return {}
     
@@ -49,17 +75,21 @@ class SRDScraper:
             print(f"⚠️  Nenhum resultado encontrado para {category}")
             return []
 
-        items = []
-        for item in tqdm(results, desc=f"Processando {category}"):
-            item_url = f"https://www.dnd5eapi.co{item['url']}"
-            item_data = self.fetch_json(item_url)
-            
-            if item_data:
-                items.append(item_data)
+        item_urls = [f"https://www.dnd5eapi.co{item['url']}" for item in results]
+        
+        # I/O de rede domina: busca em paralelo, mantendo a ordem do índice
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            fetched = list(tqdm(
+                executor.map(self.fetch_json, item_urls),
+                total=len(item_urls),
+                desc=f"Processando {category}"
+            ))
+        
+        items = [item_data for item_data in fetched if item_data]
 
         output_file = self.output_dir / f"{category}.json"
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(items, f, indent=2, ensure_ascii=False)
+        with open(output_file, 'wb') as f:
+            f.write(orjson.dumps(items, option=orjson.OPT_INDENT_2))
         
         print(f"✅ {len(items)} itens salvos em {output_file}")
         return items
@@ -0,0 +1,17 @@
+import os
+
+BLAS_THREAD_VARS = ("OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "OMP_NUM_THREADS")
+
+
+def configure_blas_threads():
+    """
+    Usa todos os núcleos no GEMV/GEMM do NumPy
+
+    O OpenBLAS/MKL lê essas variáveis só quando o NumPy é importado, e
+    sob o fork do uvicorn o padrão costuma ficar em 1 thread. Precisa
+    ser chamado antes de qualquer `import numpy`; valores já definidos
+    no ambiente são respeitados.
+    """
+    threads = str(os.cpu_count() or 1)
+    for var in BLAS_THREAD_VARS:
+        os.environ.setdefault(var, threads)
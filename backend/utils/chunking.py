@@ -1,6 +1,13 @@
+import os
+from functools import lru_cache
 from typing import List, Dict, Any
+
 import tiktoken
 
+# Cache em disco dos arquivos BPE, compartilhado entre processos/workers;
+# o tiktoken lê a variável ao carregar uma encoding (encoding_for_model)
+os.environ.setdefault("TIKTOKEN_CACHE_DIR", ".cache/tiktoken")
+
 class TextChunker:    
     
     def __init__(self, model_name: str = "gpt-3.5-turbo"):
@@ -12,6 +19,10 @@ class TextChunker:
     def count_tokens(self, text: str) -> int:        
         return len(self.encoding.encode(text))
     
+    def count_tokens_batch(self, texts: List[str]) -> List[int]:
+        # encode_batch tokeniza em paralelo no core Rust (sem o GIL)
+        return [len(tokens) for tokens in self.encoding.encode_batch(texts)]
+    
     def chunk_spell(self, spell_data: Dict) -> Dict[str, Any]:
         desc_parts = []
         
@@ -49,8 +60,7 @@ class TextChunker:
                 "school": spell_data.get('school', {}).get('name'),
                 "source": "SRD 5e",
                 "url": f"https://www.dnd5eapi.co{spell_data.get('url', '')}"
-            },
-            "token_count": self.count_tokens(full_text)
+            }
         }
     
     def chunk_monster(self, monster_data: Dict) -> Dict[str, Any]:        
@@ -91,53 +101,59 @@ class TextChunker:
                 "size": monster_data.get('size'),
                 "source": "SRD 5e",
                 "url": f"https://www.dnd5eapi.co{monster_data.get('url', '')}"
-            },
-            "token_count": self.count_tokens(full_text)
+            }
         }
     
     def chunk_rule_section(self, rule_data: Dict, max_tokens: int = 512, overlap: int = 50) -> List[Dict[str, Any]]:
-        chunks = []
-        
         title = rule_data.get('name', 'Unknown Rule')
         desc = rule_data.get('desc', '')
         full_text = f"# {title}\n\n{desc}"
-        token_count = self.count_tokens(full_text)
+        tokens = self.encoding.encode(full_text)
+        url = f"https://www.dnd5eapi.co{rule_data.get('url', '')}"
         
-        if token_count <= max_tokens:
+        if len(tokens) <= max_tokens:
             return [{
                 "text": full_text,
                 "metadata": {
                     "type": "rule",
                     "section": title,
                     "source": "SRD 5e",
-                    "url": f"https://www.dnd5eapi.co{rule_data.get('url', '')}"
+                    "url": url
                 },
-                "token_count": token_count
+                "token_count": len(tokens)
             }]
         
-        tokens = self.encoding.encode(full_text)
+        # Janelas com overlap decodificadas de uma vez só
+        windows = [
+            tokens[i:i + max_tokens]
+            for i in range(0, len(tokens), max_tokens - overlap)
+        ]
+        texts = self.encoding.decode_batch(windows, num_threads=min(len(windows), 8))
         
-        for i in range(0, len(tokens), max_tokens - overlap):
-            chunk_tokens = tokens[i:i + max_tokens]
-            chunk_text = self.encoding.decode(chunk_tokens)
-            
-            chunks.append({
+        return [
+            {
                 "text": chunk_text,
                 "metadata": {
                     "type": "rule",
                     "section": title,
-                    "chunk_index": len(chunks),
+                    "chunk_index": chunk_index,
                     "source": "SRD 5e",
-                    "url": f"https://www.dnd5eapi.co{rule_data.get('url', '')}"
+                    "url": url
                 },
                 "token_count": len(chunk_tokens)
-            })
-        
-        return chunks
+            }
+            for chunk_index, (chunk_text, chunk_tokens) in enumerate(zip(texts, windows))
+        ]
+
+
+@lru_cache(maxsize=None)
+def get_chunker(model_name: str = "gpt-3.5-turbo") -> TextChunker:
+    """TextChunker compartilhado pelo processo (e herdado por forks)"""
+    return TextChunker(model_name)
 
 
 def main():
-    chunker = TextChunker()
+    chunker = get_chunker()
     test_spell = {
         "name": "Fireball",
         "level": 3,
@@ -151,7 +167,7 @@ def main():
     }
     
     chunk = chunker.chunk_spell(test_spell)
-    print(f"✅ Chunk criado: {chunk['token_count']} tokens")
+    print(f"✅ Chunk criado: {chunker.count_tokens(chunk['text'])} tokens")
     print(chunk['text'][:200])
 
 
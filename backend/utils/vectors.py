@@ -0,0 +1,65 @@
+from typing import Optional, Tuple, Union
+import numpy as np
+
+
+def quantize_int8(
+    vectors: np.ndarray,
+    scale: Optional[float] = None,
+    axis: Optional[int] = None
+) -> Tuple[np.ndarray, Union[float, np.ndarray]]:
+    """
+    Quantização escalar simétrica para int8
+
+    Args:
+        vectors: Vetor ou matriz float
+        scale: Escala a usar; se None, usa max(|vectors|) / 127
+        axis: Eixo para escalas independentes (ex: 1 = uma escala por linha)
+
+    Returns:
+        (vetores int8, escala) com vectors ≈ quantizado * escala
+    """
+    if scale is None:
+        if axis is None:
+            scale = float(np.max(np.abs(vectors))) / 127 or 1.0
+        else:
+            scale = np.max(np.abs(vectors), axis=axis, keepdims=True) / 127
+            scale[scale == 0] = 1.0
+
+    quantized = np.clip(np.round(vectors / scale), -127, 127).astype(np.int8)
+    return quantized, scale
+
+
+# Alinhamento para loads AVX-512 sem split entre linhas de cache
+ALIGNMENT = 64
+
+
+def aligned_empty(shape: Tuple[int, ...], dtype, align: int = ALIGNMENT) -> np.ndarray:
+    """np.empty com o endereço base múltiplo de `align` bytes"""
+    dtype = np.dtype(dtype)
+    nbytes = int(np.prod(shape)) * dtype.itemsize
+    buffer = np.empty(nbytes + align, dtype=np.uint8)
+    offset = -buffer.ctypes.data % align
+    return np.ndarray(shape, dtype=dtype, buffer=buffer, offset=offset)
+
+
+def is_aligned(array: np.ndarray, align: int = ALIGNMENT) -> bool:
+    """Endereço base múltiplo de `align` bytes"""
+    return array.ctypes.data % align == 0
+
+
+def pad_columns(matrix: np.ndarray, align: int = ALIGNMENT) -> np.ndarray:
+    """
+    Completa com zeros as colunas para cada linha ocupar múltiplos de `align` bytes
+
+    Zeros não alteram produtos escalares. Com 384 dims já não há padding
+    (384 B em int8, 768 B em float16), mas outros modelos podem precisar.
+    Retorna uma cópia alinhada.
+    """
+    rows, dim = matrix.shape
+    lanes = max(align // matrix.dtype.itemsize, 1)
+    padded_dim = -(-dim // lanes) * lanes
+
+    padded = aligned_empty((rows, padded_dim), matrix.dtype, align)
+    padded[:, :dim] = matrix
+    padded[:, dim:] = 0
+    return padded
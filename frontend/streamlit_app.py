@@ -4,9 +4,18 @@ Interface de chat para o Sage's Oracle
 """
 
 import streamlit as st
-import requests
-from typing import Dict, List
-import json
+import httpx
+import orjson
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import closing
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import os
+import re
+import threading
+import time
+import uuid
 
 # Configuração da página
 st.set_page_config(
@@ -19,8 +28,11 @@ st.set_page_config(
 # URL da API
 API_URL = "http://localhost:8000"
 
-# CSS customizado
-st.markdown("""
+# Socket Unix da API na mesma máquina (uvicorn --uds ...); opcional
+API_UDS = os.getenv("SAGES_ORACLE_API_UDS")
+
+# Conteúdo estático da página, montado uma única vez
+CSS = """
 <style>
     .main-header {
         font-size: 3rem;
@@ -35,26 +47,338 @@ st.markdown("""
         font-style: italic;
         margin-bottom: 2rem;
     }
-    .source-card {
-        background-color: #f0f0f0;
-        padding: 1rem;
-        border-radius: 8px;
-        border-left: 4px solid #8B0000;
-        margin: 0.5rem 0;
-    }
     .stChatMessage {
         background-color: #f9f9f9;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+HEADER_HTML = (
+    '<h1 class="main-header">🧙‍♂️ Sage\'s Oracle</h1>'
+    '<p class="sub-header">Your AI Companion for D&D 5th Edition Rules</p>'
+)
+
+FOOTER_HTML = """
+<div style='text-align: center; color: #666; font-size: 0.9rem;'>
+    <p>🎲 Powered by RAG (Retrieval-Augmented Generation) | Data from D&D 5e SRD</p>
+    <p>Built with FastAPI, Sentence Transformers, and Streamlit</p>
+</div>
+"""
+
+HEADER_IMAGE_URL = "https://www.dndbeyond.com/avatars/thumbnails/6/359/420/618/636272680339895080.png"
+
+# Histórico de cada sessão (?sid=...) persiste em disco entre refreshes
+HISTORY_DIR = Path.home() / ".sages_oracle"
+
+# Janela do histórico: ao passar de MAX_MESSAGES, só as KEEP_MESSAGES mais
+# recentes ficam (as antigas viram um resumo); fontes só nas mais recentes
+MAX_MESSAGES = 40
+KEEP_MESSAGES = 30
+KEEP_SOURCES_MESSAGES = 10
+
+# Trocas anteriores que o backend guarda por sessão e usa no prompt; só a
+# pergunta nova é enviada, com o session_id
+BACKEND_HISTORY_TURNS = 3
+
+# Respostas que o backend devolve quando o LLM falha (não vão para o cache)
+LLM_ERROR_PREFIX = "Error calling LLM"
+
+
+class RetryTransport(httpx.HTTPTransport):
+    """
+    Transporte httpx que reenvia respostas 502/504 com backoff exponencial
+    
+    Falhas de conexão são reenviadas pelo próprio httpx (retries=). 503
+    significa base não carregada e vai direto para o usuário; a leitura
+    nunca é reenviada, pois o LLM já pode ter gerado parte da resposta.
+    """
+    
+    RETRY_STATUSES = (502, 504)
+    
+    def __init__(self, status_retries: int = 3, backoff_factor: float = 0.5, **kwargs):
+        super().__init__(**kwargs)
+        self.status_retries = status_retries
+        self.backoff_factor = backoff_factor
+    
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        for attempt in range(self.status_retries):
+            response = super().handle_request(request)
+            if response.status_code not in self.RETRY_STATUSES:
+                return response
+            response.close()
+            time.sleep(self.backoff_factor * 2 ** attempt)
+        return super().handle_request(request)
+
+
+@st.cache_resource
+def get_client() -> httpx.Client:
+    """
+    Cliente HTTP keep-alive compartilhado entre reruns do Streamlit
+    
+    Com SAGES_ORACLE_API_UDS definido, fala com a API pelo socket Unix,
+    sem passar pela pilha TCP de loopback.
+    """
+    transport = RetryTransport(
+        uds=API_UDS,
+        retries=2,
+        limits=httpx.Limits(max_connections=4, max_keepalive_connections=4)
+    )
+    return httpx.Client(
+        base_url=API_URL,
+        transport=transport,
+        timeout=httpx.Timeout(60, connect=3)
+    )
+
+
+class AnswerCache:
+    """
+    LRU com TTL de respostas completas, por (pergunta, top_k, temperatura, perguntas anteriores)
+
+    Como a resposta chega em streaming, não dá para memoizar a chamada com
+    st.cache_data; a resposta é guardada só depois do evento final.
+    """
+    
+    def __init__(self, max_entries: int = 128, ttl: float = 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple, Tuple[float, str, List[Dict]]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Tuple) -> Optional[Tuple[str, List[Dict]]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1], entry[2]
+    
+    def put(self, key: Tuple, answer: str, sources: List[Dict]):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), answer, sources)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+@st.cache_resource
+def get_answer_cache() -> AnswerCache:
+    """Cache de respostas compartilhado entre sessões e reruns"""
+    return AnswerCache()
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def download_image(url: str) -> bytes:
+    """Baixa a imagem; exceções não entram no cache, só os sucessos"""
+    response = httpx.get(url, timeout=5, follow_redirects=True)
+    response.raise_for_status()
+    return response.content
+
+
+def fetch_image(url: str) -> Optional[bytes]:
+    """Imagem em cache local, ou None se o download falhar (tenta de novo no próximo rerun)"""
+    try:
+        return download_image(url)
+    except httpx.HTTPError:
+        return None
+
+
+HEALTH_TTL = 10
+
+
+def request_health(client: httpx.Client, url: str):
+    """
+    Consulta /health, sem cache nem APIs do Streamlit (roda em thread)
+    
+    Returns:
+        (status_code, json) ou (None, {"error": ...}) se a API estiver offline
+    """
+    try:
+        response = client.get(f"{url}/health", timeout=2)
+        return response.status_code, orjson.loads(response.content)
+    except Exception as e:
+        return None, {"error": str(e)}
+
+
+@st.cache_resource
+def get_health_cache() -> Dict[str, Tuple[float, Tuple]]:
+    """Último /health bem-sucedido por URL, reaproveitado por HEALTH_TTL segundos entre reruns"""
+    return {}
+
+
+def cached_health(url: str) -> Optional[Tuple]:
+    """Resultado de /health ainda dentro do TTL, se houver"""
+    entry = get_health_cache().get(url)
+    if entry is None or time.monotonic() - entry[0] > HEALTH_TTL:
+        return None
+    return entry[1]
+
+
+@st.cache_resource
+def get_executor() -> ThreadPoolExecutor:
+    """Threads para requisições em background (ex: /health)"""
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="sages-oracle")
+
+
+def health_poll_due() -> bool:
+    """Se já passou o backoff e é hora de consultar /health de novo"""
+    return (
+        "health_last" not in st.session_state
+        or time.monotonic() >= st.session_state.get("health_next_poll_ts", 0)
+    )
+
+
+def prefetch_health() -> Optional[Future]:
+    """
+    Dispara a consulta de /health em background no início da execução
+    
+    A requisição corre em paralelo com o render do header e da sidebar;
+    get_health só espera o que ainda faltar. O cliente é resolvido aqui,
+    na thread do script, e a thread só faz a requisição.
+    """
+    if not health_poll_due() or cached_health(API_URL) is not None:
+        return None
+    return get_executor().submit(request_health, get_client(), API_URL)
+
+
+def get_health(prefetched: Optional[Future] = None):
+    """
+    Status da API com backoff exponencial enquanto ela estiver falhando
+    
+    Falhas consecutivas dobram o intervalo até a próxima tentativa
+    (máx. 60s); nesse meio tempo os reruns reaproveitam o último status.
+    Um sucesso zera o backoff e fica no cache por HEALTH_TTL segundos.
+    """
+    if not health_poll_due():
+        return st.session_state.health_last
+    
+    cached = cached_health(API_URL)
+    if cached is not None:
+        health_status, health_data = cached
+    elif prefetched is None:
+        health_status, health_data = request_health(get_client(), API_URL)
+    elif prefetched.done():
+        health_status, health_data = prefetched.result()
+    else:
+        with st.spinner("Checking API..."):
+            health_status, health_data = prefetched.result()
+    
+    if health_status == 200:
+        # Só sucessos entram no cache de TTL: falhas ficam a cargo do backoff
+        if cached is None:
+            get_health_cache()[API_URL] = (time.monotonic(), (health_status, health_data))
+        st.session_state.health_fail_streak = 0
+        st.session_state.health_next_poll_ts = 0
+    else:
+        fail_streak = st.session_state.get("health_fail_streak", 0) + 1
+        st.session_state.health_fail_streak = fail_streak
+        st.session_state.health_next_poll_ts = time.monotonic() + min(60, 2 ** fail_streak)
+    
+    st.session_state.health_last = (health_status, health_data)
+    return health_status, health_data
+
+
+def get_session_id() -> str:
+    """Id estável da sessão, guardado na URL (?sid=...) para sobreviver a refreshes"""
+    sid = st.query_params.get("sid", "")
+    if not re.fullmatch(r"[A-Za-z0-9_-]{1,64}", sid):
+        sid = uuid.uuid4().hex
+        st.query_params["sid"] = sid
+    return sid
 
-# Header
-st.markdown('<h1 class="main-header">🧙‍♂️ Sage\'s Oracle</h1>', unsafe_allow_html=True)
-st.markdown('<p class="sub-header">Your AI Companion for D&D 5th Edition Rules</p>', unsafe_allow_html=True)
+
+def history_path(sid: str) -> Path:
+    return HISTORY_DIR / f"session_{sid}.json"
+
+
+def load_history(sid: str) -> Optional[List[Dict]]:
+    """Histórico salvo da sessão, ou None se não existir (ou estiver corrompido)"""
+    try:
+        return orjson.loads(history_path(sid).read_bytes())
+    except (OSError, ValueError):
+        return None
+
+
+def save_history(sid: str, messages: List[Dict]):
+    """Grava o histórico via arquivo temporário + rename (nunca fica pela metade)"""
+    path = history_path(sid)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_bytes(orjson.dumps(messages, option=orjson.OPT_NON_STR_KEYS))
+        tmp_path.replace(path)
+    except OSError as e:
+        print(f"⚠️  Não foi possível salvar o histórico: {e}")
+
+
+def summarize(messages: List[Dict]) -> str:
+    """Resumo curto das mensagens descartadas: as perguntas já feitas"""
+    previous = [m["content"] for m in messages if m["role"] == "system"]
+    questions = [m["content"] for m in messages if m["role"] == "user"]
+    summary = previous + ([f"Earlier questions: {'; '.join(questions)}"] if questions else [])
+    return "\n\n".join(summary) or "Earlier messages were trimmed."
+
+
+def trim_history(messages: List[Dict]) -> List[Dict]:
+    """Limita o histórico a uma janela deslizante, resumindo o que sai dela"""
+    if len(messages) > MAX_MESSAGES:
+        summary = {"role": "system", "content": summarize(messages[:-KEEP_MESSAGES])}
+        messages = [summary] + messages[-KEEP_MESSAGES:]
+    
+    # Fontes antigas pesam em memória e no render; fica só o texto
+    for message in messages[:-KEEP_SOURCES_MESSAGES]:
+        message.pop("sources", None)
+    
+    return messages
+
+
+def pick_example_question():
+    """Envia o exemplo escolhido e limpa a seleção (pode ser clicado de novo)"""
+    if st.session_state.ex_pick:
+        st.session_state.example_question = st.session_state.ex_pick
+        st.session_state.ex_pick = None
+
+
+def render_sources(sources: List[Dict]):
+    """Cards das fontes com componentes nativos (sem HTML/markdown cru)"""
+    with st.expander("📚 Sources used"):
+        for source in sources:
+            with st.container(border=True):
+                st.markdown(f"**{source['type'].upper()}**: {source['name']}")
+                st.caption(f"Relevance: {source['relevance_score']:.2%}")
+                st.link_button("View source →", source['url'])
+
+
+def iter_answer_stream(response: httpx.Response, result: Dict):
+    """
+    Lê o SSE de /ask/stream, gerando os trechos da resposta conforme chegam
+    
+    O evento final 'sources' é copiado para `result` ('sources', 'context_used').
+    """
+    event = None
+    for line in response.iter_lines():
+        if line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data = orjson.loads(line[len("data:"):])
+            if event == "token":
+                yield data["delta"]
+            elif event == "sources":
+                result.update(data)
+
+
+# /health já começa a ser consultado enquanto a página é montada
+health_future = prefetch_health()
+
+# CSS customizado e header
+st.markdown(CSS, unsafe_allow_html=True)
+st.markdown(HEADER_HTML, unsafe_allow_html=True)
 
 # Sidebar
 with st.sidebar:
-    st.image("https://www.dndbeyond.com/avatars/thumbnails/6/359/420/618/636272680339895080.png", width=200)
+    st.image(fetch_image(HEADER_IMAGE_URL) or HEADER_IMAGE_URL, width=200)
     
     st.markdown("### ⚙️ Settings")
     
@@ -80,21 +404,19 @@ with st.sidebar:
     
     # Status da API
     st.markdown("### 📊 API Status")
-    try:
-        health_response = requests.get(f"{API_URL}/health", timeout=2)
-        if health_response.status_code == 200:
-            health_data = health_response.json()
-            if health_data.get("status") == "ready":
-                st.success("✅ API Online")
-                st.metric("Chunks loaded", health_data.get("chunks_loaded", 0))
-            else:
-                st.warning("⚠️ API not ready")
-                st.info(health_data.get("message", "Unknown status"))
-        else:
-            st.error("❌ API Error")
-    except:
+    health_status, health_data = get_health(health_future)
+    if health_status is None:
         st.error("❌ API Offline")
         st.info("Make sure to run: `uvicorn backend.api.main:app --reload`")
+    elif health_status == 200:
+        if health_data.get("status") == "ready":
+            st.success("✅ API Online")
+            st.metric("Chunks loaded", health_data.get("chunks_loaded", 0))
+        else:
+            st.warning("⚠️ API not ready")
+            st.info(health_data.get("message", "Unknown status"))
+    else:
+        st.error("❌ API Error")
     
     st.markdown("---")
     
@@ -108,130 +430,185 @@ with st.sidebar:
         "How do spell slots work?"
     ]
     
-    for question in example_questions:
-        if st.button(question, key=f"ex_{question}", use_container_width=True):
-            st.session_state.example_question = question
+    st.pills(
+        "Example Questions",
+        example_questions,
+        selection_mode="single",
+        default=None,
+        key="ex_pick",
+        on_change=pick_example_question,
+        label_visibility="collapsed"
+    )
 
-# Inicializar histórico de chat
+# Inicializar histórico de chat (recuperando o da sessão, se houver)
+session_id = get_session_id()
 if "messages" not in st.session_state:
-    st.session_state.messages = [
+    st.session_state.messages = load_history(session_id) or [
         {
             "role": "assistant",
             "content": "Greetings, adventurer! I am Sage, your guide to the rules of Dungeons & Dragons 5th Edition. Ask me anything about spells, monsters, rules, or game mechanics!"
         }
     ]
 
-# Exibir histórico de mensagens
-for message in st.session_state.messages:
-    with st.chat_message(message["role"]):
+
+def error_message(content: str) -> Dict:
+    """Mensagem de erro do assistente, guardada no histórico como as demais"""
+    return {"role": "assistant", "content": content, "error": True}
+
+
+def render_message(message: Dict):
+    """Desenha uma mensagem do histórico (dentro de st.chat_message)"""
+    if message.get("error"):
+        st.error(message["content"])
+    else:
         st.markdown(message["content"])
-        
-        # Se for uma resposta do assistente com fontes, mostrar
-        if message["role"] == "assistant" and "sources" in message:
-            with st.expander("📚 Sources used"):
-                for source in message["sources"]:
-                    st.markdown(f"""
-                    <div class="source-card">
-                        <strong>{source['type'].upper()}</strong>: {source['name']}<br>
-                        <small>Relevance: {source['relevance_score']:.2%}</small><br>
-                        <a href="{source['url']}" target="_blank">View source →</a>
-                    </div>
-                    """, unsafe_allow_html=True)
-
-# Input de pergunta
-question = st.chat_input("Ask about D&D 5e rules, spells, or monsters...")
-
-# Se clicou em exemplo, usar essa pergunta
-if "example_question" in st.session_state:
-    question = st.session_state.example_question
-    del st.session_state.example_question
-
-if question:
-    # Adicionar pergunta ao histórico
-    st.session_state.messages.append({"role": "user", "content": question})
-    
-    # Exibir pergunta
-    with st.chat_message("user"):
-        st.markdown(question)
-    
-    # Gerar resposta
-    with st.chat_message("assistant"):
+    
+    # Se for uma resposta do assistente com fontes, mostrar
+    if message["role"] == "assistant" and "sources" in message:
+        render_sources(message["sources"])
+
+
+def backend_history_questions(messages: List[Dict]) -> Tuple[str, ...]:
+    """
+    Perguntas das últimas trocas que o backend guarda para a sessão
+    
+    Só contam trocas respondidas com sucesso (pergunta seguida de resposta
+    sem erro), como no SessionStore do backend.
+    """
+    questions = []
+    for previous, message in zip(messages, messages[1:]):
+        if (
+            previous["role"] == "user"
+            and message["role"] == "assistant"
+            and not message.get("error")
+            and LLM_ERROR_PREFIX not in message["content"]
+        ):
+            questions.append(previous["content"])
+    return tuple(questions[-BACKEND_HISTORY_TURNS:])
+
+
+def record_cached_turn(session_id: str, question: str, answer: str):
+    """Avisa o backend de uma troca respondida pelo cache local"""
+    try:
+        get_client().post(
+            f"/sessions/{session_id}/turns",
+            json={"question": question, "answer": answer},
+            timeout=2
+        )
+    except Exception as e:
+        print(f"⚠️  Não foi possível registrar a troca no backend: {e}")
+
+
+def ask_backend(session_id: str, question: str, top_k: int, temperature: float, cache_key: Tuple) -> Dict:
+    """
+    Pergunta à API via streaming, desenhando a resposta conforme chega
+    
+    Returns:
+        Mensagem do assistente para o histórico (resposta ou erro)
+    """
+    try:
+        # Chamar API (streaming: os tokens aparecem conforme o LLM gera)
         with st.spinner("🔮 Consulting the ancient tomes..."):
-            try:
-                # Chamar API
-                response = requests.post(
-                    f"{API_URL}/ask",
-                    json={
-                        "question": question,
-                        "top_k": top_k,
-                        "temperature": temperature
-                    },
-                    timeout=60
-                )
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    answer = result["answer"]
-                    sources = result["sources"]
-                    
-                    # Exibir resposta
-                    st.markdown(answer)
-                    
-                    # Exibir fontes
-                    with st.expander("📚 Sources used"):
-                        for source in sources:
-                            st.markdown(f"""
-                            <div class="source-card">
-                                <strong>{source['type'].upper()}</strong>: {source['name']}<br>
-                                <small>Relevance: {source['relevance_score']:.2%}</small><br>
-                                <a href="{source['url']}" target="_blank">View source →</a>
-                            </div>
-                            """, unsafe_allow_html=True)
-                    
-                    # Salvar no histórico
-                    st.session_state.messages.append({
-                        "role": "assistant",
-                        "content": answer,
-                        "sources": sources
-                    })
+            client = get_client()
+            request = client.build_request(
+                "POST",
+                "/ask/stream",
+                json={
+                    "session_id": session_id,
+                    "question": question,
+                    "top_k": top_k,
+                    "temperature": temperature
+                }
+            )
+            response = client.send(request, stream=True)
+        
+        with closing(response):
+            if response.status_code == 200:
+                result = {}
+                answer = st.write_stream(iter_answer_stream(response, result))
+                sources = result.get("sources", [])
                 
-                elif response.status_code == 503:
-                    error_msg = "⚠️ The knowledge base is not ready. Please run the ETL pipeline first:\n```bash\npython -m backend.etl.pipeline\n```"
-                    st.error(error_msg)
-                    st.session_state.messages.append({
-                        "role": "assistant",
-                        "content": error_msg
-                    })
+                # Só respostas completas (com o evento final) e sem erro do LLM
+                if "sources" in result and LLM_ERROR_PREFIX not in answer:
+                    get_answer_cache().put(cache_key, answer, sources)
                 
-                else:
-                    error_msg = f"❌ Error: {response.status_code} - {response.text}"
-                    st.error(error_msg)
-                    st.session_state.messages.append({
-                        "role": "assistant",
-                        "content": error_msg
-                    })
+                render_sources(sources)
+                return {"role": "assistant", "content": answer, "sources": sources}
             
-            except requests.exceptions.ConnectionError:
-                error_msg = "❌ Cannot connect to API. Make sure it's running:\n```bash\nuvicorn backend.api.main:app --reload\n```"
-                st.error(error_msg)
-                st.session_state.messages.append({
-                    "role": "assistant",
-                    "content": error_msg
-                })
+            if response.status_code == 503:
+                message = error_message("⚠️ The knowledge base is not ready. Please run the ETL pipeline first:\n```bash\npython -m backend.etl.pipeline\n```")
+            else:
+                response.read()
+                message = error_message(f"❌ Error: {response.status_code} - {response.text}")
+    
+    except (httpx.ConnectError, httpx.ConnectTimeout):
+        message = error_message("❌ Cannot connect to API. Make sure it's running:\n```bash\nuvicorn backend.api.main:app --reload\n```")
+    
+    except Exception as e:
+        message = error_message(f"❌ Unexpected error: {str(e)}")
+    
+    render_message(message)
+    return message
+
+
+@st.fragment
+def chat_area(session_id: str, top_k: int, temperature: float):
+    """
+    Histórico, input e resposta do chat
+    
+    Como fragment, enviar uma pergunta reexecuta só esta área; sidebar
+    (sliders, status da API, exemplos) fica de fora. Tudo é desenhado a
+    partir das mensagens do histórico, uma única vez por execução.
+    """
+    # Exibir histórico de mensagens
+    with st.container():
+        for message in st.session_state.messages:
+            with st.chat_message(message["role"]):
+                render_message(message)
+
+    # Input de pergunta
+    question = st.chat_input("Ask about D&D 5e rules, spells, or monsters...")
+
+    # Se clicou em exemplo, usar essa pergunta
+    if "example_question" in st.session_state:
+        question = st.session_state.example_question
+        del st.session_state.example_question
+
+    if question:
+        # Um novo envio interrompe a execução anterior (e sua requisição), que
+        # pode já ter registrado a pergunta; ela não é repetida no histórico
+        user_message = {"role": "user", "content": question}
+        if st.session_state.messages[-1:] != [user_message]:
+            st.session_state.messages.append(user_message)
+        
+        with st.chat_message("user"):
+            render_message(user_message)
+        
+        # Gerar resposta
+        with st.chat_message("assistant"):
+            # O backend responde considerando as últimas trocas da sessão,
+            # então elas também entram na chave do cache
+            previous_questions = backend_history_questions(st.session_state.messages[:-1])
+            cache_key = (question, top_k, temperature, previous_questions)
+            cached = get_answer_cache().get(cache_key)
+            
+            if cached is not None:
+                # Mesma pergunta com os mesmos parâmetros: sem ida ao backend
+                answer, sources = cached
+                message = {"role": "assistant", "content": answer, "sources": sources}
+                render_message(message)
+                record_cached_turn(session_id, question, answer)
             
-            except Exception as e:
-                error_msg = f"❌ Unexpected error: {str(e)}"
-                st.error(error_msg)
-                st.session_state.messages.append({
-                    "role": "assistant",
-                    "content": error_msg
-                })
+            else:
+                message = ask_backend(session_id, question, top_k, temperature, cache_key)
+        
+        st.session_state.messages.append(message)
+        st.session_state.messages = trim_history(st.session_state.messages)
+        save_history(session_id, st.session_state.messages)
+
+
+chat_area(session_id, top_k, temperature)
 
 # Footer
 st.markdown("---")
-st.markdown("""
-<div style='text-align: center; color: #666; font-size: 0.9rem;'>
-    <p>🎲 Powered by RAG (Retrieval-Augmented Generation) | Data from D&D 5e SRD</p>
-    <p>Built with FastAPI, Sentence Transformers, and Streamlit</p>
-</div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+st.markdown(FOOTER_HTML, unsafe_allow_html=True)
@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from backend.api.batching import MicroBatcher
+
+
+def double_all(items):
+    if any(item < 0 for item in items):
+        raise ValueError("negativo")
+    return [item * 2 for item in items]
+
+
+@pytest.mark.asyncio
+async def test_results_are_scattered_in_submit_order():
+    calls = []
+
+    def batch_fn(items):
+        calls.append(list(items))
+        return double_all(items)
+
+    batcher = MicroBatcher(batch_fn, max_batch_size=8, max_wait_ms=50)
+    batcher.start()
+    try:
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+    finally:
+        await batcher.stop()
+
+    assert results == [0, 2, 4, 6, 8]
+    assert calls == [[0, 1, 2, 3, 4]]
+
+
+@pytest.mark.asyncio
+async def test_batches_respect_max_batch_size():
+    sizes = []
+
+    def batch_fn(items):
+        sizes.append(len(items))
+        return double_all(items)
+
+    batcher = MicroBatcher(batch_fn, max_batch_size=2, max_wait_ms=50)
+    batcher.start()
+    try:
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+    finally:
+        await batcher.stop()
+
+    assert results == [0, 2, 4, 6, 8]
+    assert max(sizes) <= 2
+    assert sum(sizes) == 5
+
+
+@pytest.mark.asyncio
+async def test_failing_item_only_fails_its_own_request():
+    batcher = MicroBatcher(double_all, max_batch_size=8, max_wait_ms=50)
+    batcher.start()
+    try:
+        results = await asyncio.gather(
+            batcher.submit(1), batcher.submit(-1), batcher.submit(3),
+            return_exceptions=True
+        )
+    finally:
+        await batcher.stop()
+
+    assert results[0] == 2
+    assert isinstance(results[1], ValueError)
+    assert results[2] == 6
+
+
+@pytest.mark.asyncio
+async def test_batcher_keeps_running_after_a_failure():
+    batcher = MicroBatcher(double_all, max_batch_size=8, max_wait_ms=10)
+    batcher.start()
+    try:
+        with pytest.raises(ValueError):
+            await batcher.submit(-1)
+        assert await batcher.submit(4) == 8
+    finally:
+        await batcher.stop()
@@ -0,0 +1,85 @@
+import numpy as np
+import orjson
+import pytest
+
+from backend.core.chunk_store import ChunkStore, write_chunks
+
+
+CHUNKS = [
+    {
+        "text": "Fireball: a bright streak flashes...",
+        "metadata": {"type": "spell", "name": "Fireball", "level": 3, "chunk_index": 0},
+        "token_count": 12
+    },
+    {
+        "text": "Goblin: small humanoid",
+        "metadata": {"type": "monster", "name": "Goblin", "cr": 0.25, "chunk_index": 0},
+        "token_count": 5
+    },
+    {
+        "text": "Ogre: large giant",
+        "metadata": {"type": "monster", "name": "Ogre", "cr": 2, "chunk_index": 1},
+        "token_count": 4
+    }
+]
+
+
+@pytest.fixture
+def store(tmp_path):
+    path = tmp_path / "all_chunks.parquet"
+    write_chunks(CHUNKS, path)
+    return ChunkStore.from_file(path)
+
+
+def test_parquet_round_trip_rebuilds_chunks(store):
+    assert len(store) == 3
+    assert store[0] == CHUNKS[0]
+    assert store[1]["text"] == CHUNKS[1]["text"]
+    assert store[1]["token_count"] == 5
+
+
+def test_numeric_metadata_keeps_its_type(store):
+    fireball = store[0]["metadata"]
+    assert fireball["level"] == 3
+    assert isinstance(fireball["level"], int)
+
+    # 'cr' misto (int e float) continua numérico
+    assert store[1]["metadata"]["cr"] == 0.25
+    assert store[2]["metadata"]["cr"] == 2
+    assert isinstance(store[2]["metadata"]["cr"], float)
+
+
+def test_legacy_json_matches_parquet(tmp_path, store):
+    path = tmp_path / "all_chunks.json"
+    path.write_bytes(orjson.dumps(CHUNKS))
+
+    assert list(ChunkStore.from_file(path)) == list(store)
+
+
+def test_empty_chunk_list_round_trips(tmp_path):
+    path = tmp_path / "all_chunks.parquet"
+    write_chunks([], path)
+
+    store = ChunkStore.from_file(path)
+
+    assert len(store) == 0
+    assert list(store) == []
+    assert store.filter_by_type("spell") == []
+
+
+def test_metadata_columns_are_dense_and_missing_keys_are_left_out(store):
+    assert store.texts == [chunk["text"] for chunk in CHUNKS]
+    assert store.token_counts.tolist() == [12, 5, 4]
+    assert store.metadata_columns["name"].tolist() == ["Fireball", "Goblin", "Ogre"]
+
+    assert "cr" not in store[0]["metadata"]
+    assert "level" not in store[1]["metadata"]
+
+
+def test_filter_by_type_uses_the_type_index(store):
+    np.testing.assert_array_equal(store.by_type["monster"], [1, 2])
+    np.testing.assert_array_equal(store.by_type["spell"], [0])
+
+    assert [m["name"] for m in store.filter_by_type("monster")] == ["Goblin", "Ogre"]
+    assert [m["name"] for m in store.filter_by_type("spell")] == ["Fireball"]
+    assert store.filter_by_type("item") == []
@@ -0,0 +1,142 @@
+import numpy as np
+import pytest
+
+from backend.core import rag_engine
+from backend.core.rag_engine import RAGEngine
+from backend.utils.vectors import pad_columns, quantize_int8
+
+
+DIM = 48
+PADDED_DIM = 64
+TOP_K = 5
+# Similaridade plantada dos vizinhos de cada pergunta; o resto da base é
+# aleatório (|coseno| bem abaixo de 0.6 em 48 dims)
+PLANTED = (0.95, 0.9, 0.85, 0.8, 0.75)
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.linalg.norm(vectors, axis=-1, keepdims=True)
+
+
+def pad(matrix: np.ndarray, width: int) -> np.ndarray:
+    padded = np.zeros((len(matrix), width), dtype=np.float32)
+    padded[:, :matrix.shape[1]] = matrix
+    return padded
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    """(queries (3, DIM), base (300, DIM) normalizada, top-k esperado por pergunta)"""
+    rng = np.random.default_rng(0)
+    queries = normalize(rng.standard_normal((3, DIM))).astype(np.float32)
+    base = normalize(rng.standard_normal((300, DIM)))
+
+    expected = []
+    for q, query in enumerate(queries):
+        rows = rng.choice(np.arange(q * 100, q * 100 + 100), size=len(PLANTED), replace=False)
+        for row, similarity in zip(rows, PLANTED):
+            noise = rng.standard_normal(DIM)
+            noise = normalize(noise - (noise @ query) * query)
+            base[row] = similarity * query + np.sqrt(1 - similarity ** 2) * noise
+        expected.append(rows)
+
+    return queries, base.astype(np.float32), np.array(expected)
+
+
+def make_engine(embeddings, embeddings_scale=None, index=None) -> RAGEngine:
+    engine = RAGEngine.__new__(RAGEngine)
+    engine.embeddings = embeddings
+    engine.embeddings_scale = embeddings_scale
+    engine.index = index
+    engine.chunks = [{"id": i} for i in range(len(embeddings))]
+    return engine
+
+
+def assert_top_k(scores, indices, expected, atol):
+    np.testing.assert_array_equal(indices, expected)
+    np.testing.assert_allclose(scores, np.broadcast_to(PLANTED, scores.shape), atol=atol)
+
+
+def test_exhaustive_search_orders_the_top_k(corpus, monkeypatch):
+    monkeypatch.setattr(rag_engine, "simsimd", None)
+    queries, base, expected = corpus
+
+    scores, indices = make_engine(base)._search(queries, TOP_K)
+
+    assert_top_k(scores, indices, expected, atol=1e-5)
+
+
+def test_retrieve_batch_cuts_each_query_to_its_top_k(corpus, monkeypatch):
+    monkeypatch.setattr(rag_engine, "simsimd", None)
+    queries, base, expected = corpus
+
+    results = make_engine(base).retrieve_batch(None, [5, 2, 1], queries)
+
+    assert [[chunk["id"] for chunk, _ in result] for result in results] == [
+        expected[0].tolist(), expected[1][:2].tolist(), expected[2][:1].tolist()
+    ]
+    assert results[1][0][1] == pytest.approx(PLANTED[0], abs=1e-5)
+
+
+def test_k_larger_than_the_base_returns_every_row(corpus, monkeypatch):
+    monkeypatch.setattr(rag_engine, "simsimd", None)
+    queries, base, _ = corpus
+
+    scores, indices = make_engine(base[:3])._search(queries, TOP_K)
+
+    assert indices.shape == (3, 3)
+    assert (np.diff(scores, axis=1) <= 0).all()
+
+
+@pytest.mark.skipif(rag_engine.simsimd is None, reason="SimSIMD não instalado")
+def test_int8_simsimd_matches_float_search(corpus):
+    queries, base, expected = corpus
+    quantized, scale = quantize_int8(base)
+
+    engine = make_engine(pad_columns(quantized), embeddings_scale=scale)
+    scores, indices = engine._search(pad(queries, PADDED_DIM), TOP_K)
+
+    assert_top_k(scores, indices, expected, atol=2e-2)
+
+
+@pytest.mark.skipif(rag_engine.simsimd is None, reason="SimSIMD não instalado")
+def test_float16_simsimd_matches_float_search(corpus):
+    queries, base, expected = corpus
+
+    engine = make_engine(pad_columns(base.astype(np.float16)))
+    scores, indices = engine._search(pad(queries, PADDED_DIM), TOP_K)
+
+    assert_top_k(scores, indices, expected, atol=5e-3)
+
+
+def test_blocked_numpy_fallback_matches_float_search(corpus, monkeypatch):
+    monkeypatch.setattr(rag_engine, "simsimd", None)
+    # Blocos menores que a base, com o último incompleto
+    monkeypatch.setattr(rag_engine, "SIMILARITY_BLOCK_ROWS", 64)
+    queries, base, expected = corpus
+
+    engine = make_engine(pad_columns(base.astype(np.float16)))
+    scores, indices = engine._search(pad(queries, PADDED_DIM), TOP_K)
+
+    assert_top_k(scores, indices, expected, atol=5e-3)
+    assert scores.dtype == np.float32
+
+
+@pytest.mark.skipif(rag_engine.faiss is None, reason="FAISS não instalado")
+@pytest.mark.parametrize("index_dim, query_dim", [
+    (PADDED_DIM, PADDED_DIM),
+    (DIM, PADDED_DIM),
+    (PADDED_DIM, DIM)
+])
+def test_hnsw_search_fits_the_query_width(corpus, index_dim, query_dim):
+    faiss = rag_engine.faiss
+    queries, base, expected = corpus
+
+    index = faiss.IndexHNSWFlat(index_dim, 32, faiss.METRIC_INNER_PRODUCT)
+    index.add(pad(base, index_dim))
+    index.hnsw.efSearch = rag_engine.HNSW_EF_SEARCH
+
+    engine = make_engine(pad_columns(base.astype(np.float16)), index=index)
+    scores, indices = engine._search(pad(queries, query_dim), TOP_K)
+
+    assert_top_k(scores, indices, expected, atol=1e-5)
@@ -0,0 +1,52 @@
+import numpy as np
+
+from backend.core.semantic_cache import SemanticCache
+
+
+def unit(*values):
+    vector = np.array(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def test_semantic_cache_hits_similar_embeddings():
+    cache = SemanticCache(dim=3, threshold=0.95)
+    cache.put(unit(1, 0, 0), "fireball")
+
+    assert cache.get(unit(1, 0.05, 0)) == "fireball"
+    assert cache.get(unit(0, 1, 0)) is None
+
+
+def test_semantic_cache_empty():
+    assert SemanticCache(dim=3).get(unit(1, 0, 0)) is None
+
+
+def test_semantic_cache_params_must_match():
+    cache = SemanticCache(dim=3)
+    cache.put(unit(1, 0, 0), "top5", params=(5, 0.3))
+    cache.put(unit(1, 0, 0), "top10", params=(10, 0.3))
+
+    assert cache.get(unit(1, 0, 0), params=(5, 0.3)) == "top5"
+    assert cache.get(unit(1, 0, 0), params=(10, 0.3)) == "top10"
+    assert cache.get(unit(1, 0, 0), params=(3, 0.3)) is None
+
+
+def test_semantic_cache_prefers_the_closest_entry():
+    cache = SemanticCache(dim=3, threshold=0.9)
+    cache.put(unit(1, 0.3, 0), "far")
+    cache.put(unit(1, 0.01, 0), "near")
+
+    assert cache.get(unit(1, 0, 0)) == "near"
+
+
+def test_semantic_cache_evicts_least_recently_used():
+    cache = SemanticCache(dim=3, max_entries=2)
+    cache.put(unit(1, 0, 0), "a")
+    cache.put(unit(0, 1, 0), "b")
+    assert cache.get(unit(1, 0, 0)) == "a"
+
+    cache.put(unit(0, 0, 1), "c")
+
+    assert len(cache) == 2
+    assert cache.get(unit(0, 1, 0)) is None
+    assert cache.get(unit(1, 0, 0)) == "a"
+    assert cache.get(unit(0, 0, 1)) == "c"
@@ -0,0 +1,24 @@
+from backend.core.session_store import SessionStore
+
+
+def test_session_store_keeps_last_turns_in_order():
+    store = SessionStore(max_turns=2)
+    for i in range(3):
+        store.append("s1", f"q{i}", f"a{i}")
+
+    assert store.get("s1") == [("q1", "a1"), ("q2", "a2")]
+    assert store.get("unknown") == []
+
+
+def test_session_store_evicts_least_recently_used_session():
+    store = SessionStore(max_sessions=2)
+    store.append("s1", "q", "a")
+    store.append("s2", "q", "a")
+    store.get("s1")
+
+    store.append("s3", "q", "a")
+
+    assert len(store) == 2
+    assert store.get("s2") == []
+    assert store.get("s1") == [("q", "a")]
+    assert store.get("s3") == [("q", "a")]
@@ -0,0 +1,30 @@
+import orjson
+
+from backend.api.main import _sse_event, _stream_answer
+
+
+def parse_events(frames):
+    events = []
+    for frame in frames:
+        assert frame.endswith("\n\n")
+        event_line, data_line = frame.strip("\n").split("\n")
+        events.append((event_line[len("event: "):], orjson.loads(data_line[len("data: "):])))
+    return events
+
+
+def test_sse_event_framing():
+    assert _sse_event("token", {"delta": "Fi"}) == 'event: token\ndata: {"delta":"Fi"}\n\n'
+
+
+def test_stream_answer_emits_tokens_then_sources():
+    sources = [{"name": "Fireball", "type": "spell"}]
+    completed = []
+
+    events = parse_events(_stream_answer(iter(["Fire", "ball "]), sources, completed.append))
+
+    assert events == [
+        ("token", {"delta": "Fire"}),
+        ("token", {"delta": "ball "}),
+        ("sources", {"sources": sources, "context_used": 1})
+    ]
+    assert completed == [{"answer": "Fireball", "sources": sources, "context_used": 1}]
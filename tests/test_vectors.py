@@ -0,0 +1,71 @@
+import numpy as np
+
+from backend.utils.vectors import ALIGNMENT, aligned_empty, is_aligned, pad_columns, quantize_int8
+
+
+def test_quantize_int8_global_scale_round_trip():
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((10, 384)).astype(np.float32)
+
+    quantized, scale = quantize_int8(vectors)
+
+    assert quantized.dtype == np.int8
+    assert isinstance(scale, float)
+    assert np.abs(quantized).max() == 127
+    np.testing.assert_allclose(quantized * scale, vectors, atol=scale / 2 + 1e-6)
+
+
+def test_quantize_int8_per_row_scale():
+    vectors = np.array([[1.0, -0.5], [10.0, 5.0]], dtype=np.float32)
+
+    quantized, scale = quantize_int8(vectors, axis=1)
+
+    assert scale.shape == (2, 1)
+    np.testing.assert_array_equal(quantized, [[127, -64], [127, 64]])
+
+
+def test_quantize_int8_zero_vectors_keep_unit_scale():
+    _, scale = quantize_int8(np.zeros(8, dtype=np.float32))
+    assert scale == 1.0
+
+    quantized, scale = quantize_int8(np.zeros((2, 4), dtype=np.float32), axis=1)
+    np.testing.assert_array_equal(scale, 1.0)
+    assert not quantized.any()
+
+
+def test_quantize_int8_reuses_given_scale():
+    quantized, scale = quantize_int8(np.array([0.5, 3.0]), scale=0.01)
+
+    assert scale == 0.01
+    np.testing.assert_array_equal(quantized, [50, 127])
+
+
+def test_aligned_empty():
+    for dtype in (np.int8, np.float16, np.float32):
+        array = aligned_empty((3, 5), dtype)
+        assert array.shape == (3, 5)
+        assert array.dtype == dtype
+        assert is_aligned(array)
+
+
+def test_pad_columns_pads_to_whole_cache_lines():
+    matrix = np.arange(6, dtype=np.float32).reshape(2, 3)
+
+    padded = pad_columns(matrix)
+
+    assert padded.shape == (2, ALIGNMENT // 4)
+    assert is_aligned(padded)
+    np.testing.assert_array_equal(padded[:, :3], matrix)
+    assert not padded[:, 3:].any()
+
+
+def test_pad_columns_keeps_aligned_width():
+    matrix = np.ones((4, 384), dtype=np.int8)
+
+    padded = pad_columns(matrix)
+
+    assert padded.shape == (4, 384)
+    assert is_aligned(padded)
+    assert padded is not matrix
+    np.testing.assert_array_equal(padded, matrix)
+    assert pad_columns(np.ones((1, 100), dtype=np.float16)).shape == (1, 128)